@@ -0,0 +1,304 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class MockServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connects when a client opens its whole pool at once.
+    request_queue_size = 256
+    daemon_threads = True
+
+class MockJira:
+    """Synthetic stand-in for the Jira REST endpoints `jira-exporter.py` uses.
+
+    Serves `/search`, `/issue/{key}` (plus `/comment` and `/changelog`),
+    `/user`, `/user/search`, `/field`, `/project/{key}` and attachment
+    downloads for a project of `issues` issues numbered 1..n. Every response is
+    delayed by `latency_ms` (with up to `jitter` of it added or removed), and a
+    `rate_429` share of requests is answered with 429 and `Retry-After`.
+    Issue size is set by the description length and the number of comments,
+    history entries and attachments. With `attachment_redirects` attachment
+    URLs answer with a 303 to a `/media` path, like Jira Cloud's media host.
+    Request counts per endpoint are served at `/__stats`.
+    """
+
+    CUSTOM_FIELDS = [
+        {'id': 'customfield_10001', 'name': 'Notes',
+         'schema': {'custom': 'com.atlassian.jira.plugin.system.customfieldtypes:textarea'}},
+        {'id': 'customfield_10002', 'name': 'Reviewer',
+         'schema': {'custom': 'com.atlassian.jira.plugin.system.customfieldtypes:userpicker'}},
+        {'id': 'customfield_10003', 'name': 'Approved At',
+         'schema': {'custom': 'com.atlassian.jira.plugin.system.customfieldtypes:datetime'}},
+        {'id': 'customfield_10004', 'name': 'Category',
+         'schema': {'custom': 'com.atlassian.jira.plugin.system.customfieldtypes:select'}},
+        {'id': 'customfield_10005', 'name': 'Watchers',
+         'schema': {'custom': 'com.atlassian.jira.plugin.system.customfieldtypes:multiuserpicker'}},
+        {'id': 'summary', 'name': 'Summary'}
+    ]
+
+    def __init__(self, project_key='BENCH', issues=1000, latency_ms=0.0, jitter=0.2, rate_429=0.0,
+                 retry_after_seconds=1, description_bytes=1000, comments=5, embedded_comments=20,
+                 histories=10, embedded_histories=100, attachments=1, attachment_bytes=64 * 1024,
+                 attachment_redirects=False, users=50, link_every=10, external_link_every=100, max_results=100, seed=0):
+        self.project_key = project_key
+        self.issues = issues
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after_seconds = retry_after_seconds
+        self.description_bytes = description_bytes
+        self.comments = comments
+        self.embedded_comments = embedded_comments
+        self.histories = histories
+        self.embedded_histories = embedded_histories
+        self.attachments = attachments
+        self.attachment_bytes = attachment_bytes
+        self.attachment_redirects = attachment_redirects
+        self.users = users
+        self.link_every = link_every
+        self.external_link_every = external_link_every
+        self.max_results = max_results
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.server = None
+        self.base_url = None
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def delay(self):
+        if not self.latency_ms:
+            return
+        with self.lock:
+            factor = 1 + self.random.uniform(-self.jitter, self.jitter)
+        time.sleep(self.latency_ms * factor / 1000)
+
+    def throttled(self):
+        if not self.rate_429:
+            return False
+        with self.lock:
+            return self.random.random() < self.rate_429
+
+    @staticmethod
+    def timestamp(day):
+        return f"2024-{1 + day // 28 % 12:02d}-{1 + day % 28:02d}T10:00:00.000+0000"
+
+    def user(self, index):
+        name = f"user{index % self.users}"
+        return {'name': name, 'key': name, 'accountId': f"acc-{name}", 'emailAddress': f"{name}@example.com",
+                'displayName': name.title()}
+
+    def comment(self, number, index):
+        return {'id': str(number * 1000 + index), 'body': f"Comment {index} on issue {number}.",
+                'author': self.user(number + index), 'created': self.timestamp(number + index)}
+
+    def history(self, number, index):
+        return {'id': str(number * 1000 + index), 'author': self.user(number * 3 + index),
+                'created': self.timestamp(number + index),
+                'items': [{'field': 'status', 'fieldtype': 'jira', 'from': '1', 'fromString': 'Open',
+                           'to': '3', 'toString': 'In Progress'}]}
+
+    def issue_links(self, project_key, number):
+        links = []
+        if project_key != self.project_key:
+            return links
+        if self.link_every and number % self.link_every == 0 and number > 1:
+            links.append({'type': {'name': 'Relates'}, 'outwardIssue': {'key': f"{project_key}-{number - 1}"}})
+        if self.external_link_every and number % self.external_link_every == 0:
+            links.append({'type': {'name': 'Blocks'}, 'inwardIssue': {'key': f"EXT-{number}"}})
+        return links
+
+    @lru_cache(maxsize=4096)
+    def issue(self, issue_key, host):
+        project_key, _, number = issue_key.rpartition('-')
+        number = int(number)
+        project_offset = 0 if project_key == self.project_key else 10 ** 7
+        comments = [self.comment(number, index) for index in range(self.comments)]
+        histories = [self.history(number, index) for index in range(self.histories)]
+        attachments = [
+            {'id': str(number * 100 + index), 'filename': f"file-{number}-{index}.bin",
+             'author': self.user(number), 'created': self.timestamp(number), 'size': self.attachment_bytes,
+             'content': f"http://{host}/secure/attachment/{number * 100 + index}/file-{number}-{index}.bin"}
+            for index in range(self.attachments)
+        ]
+        return {
+            'id': str(10000 + project_offset + number),
+            'key': issue_key,
+            'fields': {
+                'summary': f"Synthetic issue {number}",
+                'description': ('Lorem ipsum dolor sit amet. ' * (self.description_bytes // 28 + 1))[:self.description_bytes],
+                'priority': {'name': ('Low', 'Medium', 'High')[number % 3]},
+                'status': {'name': ('Open', 'In Progress', 'Done')[number % 3]},
+                'resolution': {'name': 'Fixed'} if number % 3 == 2 else None,
+                'issuetype': {'name': ('Bug', 'Task', 'Story')[number % 3]},
+                'reporter': self.user(number),
+                'assignee': self.user(number + 1) if number % 4 else None,
+                'labels': [f"label{number % 5}"],
+                'created': self.timestamp(number),
+                'updated': self.timestamp(number + 1),
+                'resolutiondate': self.timestamp(number + 2) if number % 3 == 2 else None,
+                'duedate': None,
+                'versions': [{'name': '1.0'}],
+                'fixVersions': [{'name': '1.1'}] if number % 2 else [],
+                'components': [{'name': 'Core'}],
+                'customfield_10001': f"Notes for issue {number}",
+                'customfield_10002': self.user(number + 2),
+                'customfield_10003': self.timestamp(number),
+                'customfield_10004': {'value': f"Category {number % 4}"},
+                'customfield_10005': [self.user(number + 3), self.user(number + 4)],
+                'attachment': attachments,
+                'issuelinks': self.issue_links(project_key, number),
+                'comment': {'comments': comments[:self.embedded_comments], 'total': len(comments),
+                            'maxResults': self.embedded_comments, 'startAt': 0}
+            },
+            'changelog': {'histories': histories[:self.embedded_histories], 'total': len(histories),
+                          'maxResults': self.embedded_histories, 'startAt': 0}
+        }
+
+    def search(self, jql, start_at, max_results, host):
+        match = re.search(r'key in \(([^)]*)\)', jql)
+        if match:
+            keys = [key.strip().strip('"') for key in match.group(1).split(',') if key.strip()]
+            keys.sort(key=lambda key: (key.rpartition('-')[0], int(key.rpartition('-')[2])))
+        else:
+            low = re.search(r'issuekey >= \S+-(\d+)', jql)
+            high = re.search(r'issuekey <= \S+-(\d+)', jql)
+            numbers = range(int(high.group(1)) if high else self.issues, int(low.group(1)) - 1 if low else 0, -1)
+            if 'updated >=' in jql:
+                numbers = [number for number in numbers if number % 10 == 0]
+            keys = [f"{self.project_key}-{number}" for number in numbers if number <= self.issues]
+        max_results = min(max_results, self.max_results)
+        return {
+            'startAt': start_at,
+            'maxResults': max_results,
+            'total': len(keys),
+            'issues': [self.issue(key, host) for key in keys[start_at:start_at + max_results]]
+        }
+
+    def handle(self, path, query, host):
+        """Returns `(endpoint name, status, body bytes or JSON value)` for a GET."""
+        param = lambda name, default=None: query.get(name, [default])[0]
+        if path == '/rest/api/2/search':
+            return 'search', 200, self.search(param('jql', ''), int(param('startAt', 0)),
+                                               int(param('maxResults', 50)), host)
+        match = re.match(r'/rest/api/2/issue/([A-Z][A-Z0-9]*-\d+)(/comment|/changelog)?$', path)
+        if match:
+            issue = self.issue(match.group(1), host)
+            start_at = int(param('startAt', 0))
+            max_results = min(int(param('maxResults', 100)), self.max_results)
+            number = int(match.group(1).rpartition('-')[2])
+            if match.group(2) == '/comment':
+                comments = [self.comment(number, index) for index in range(self.comments)]
+                return 'issue_comments', 200, {'startAt': start_at, 'maxResults': max_results, 'total': len(comments),
+                                               'comments': comments[start_at:start_at + max_results]}
+            if match.group(2) == '/changelog':
+                histories = [self.history(number, index) for index in range(self.histories)]
+                return 'issue_changelog', 200, {'startAt': start_at, 'maxResults': max_results,
+                                                'total': len(histories),
+                                                'isLast': start_at + max_results >= len(histories),
+                                                'values': histories[start_at:start_at + max_results]}
+            if 'changelog' in (param('expand') or ''):
+                histories = [self.history(number, index) for index in range(self.histories)]
+                issue = dict(issue, changelog={'histories': histories, 'total': len(histories),
+                                               'maxResults': len(histories), 'startAt': 0})
+            return 'issue', 200, issue
+        if path in ('/rest/api/2/user', '/rest/api/3/user/search'):
+            name = param('username') or param('query') or 'unknown'
+            index = int(re.sub(r'\D', '', name.split('@')[0]) or 0)
+            user = dict(self.user(index), groups={
+                'items': [{'name': 'jira-administrators'}] if index % 3 == 0 else [{'name': 'jira-users'}]
+            })
+            return 'user', 200, [user] if path.endswith('/search') else user
+        if path == '/rest/api/2/field':
+            return 'field', 200, self.CUSTOM_FIELDS
+        if path.startswith('/rest/api/2/project/'):
+            project_key = path.rsplit('/', 1)[1]
+            return 'project', 200, {'id': '10000', 'key': project_key, 'name': f"{project_key} benchmark project",
+                                    'projectTypeKey': 'software'}
+        if self.attachment_redirects and path.startswith('/secure/attachment/'):
+            return 'attachment_redirect', 303, '/media' + path
+        match = re.match(r'(?:/media)?/secure/attachment/(\d+)/', path)
+        if match:
+            attachment_id = int(match.group(1))
+            pattern = f"attachment {attachment_id % 50}\n".encode()
+            return 'attachment', 200, (pattern * (self.attachment_bytes // len(pattern) + 1))[:self.attachment_bytes]
+        return 'unknown', 404, {'errorMessages': [f"No mock for {path}"]}
+
+    def make_handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def send(self, status, body, headers=()):
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode('utf-8')
+                    headers = (('Content-Type', 'application/json'),) + tuple(headers)
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/__stats':
+                    with mock.lock:
+                        stats = dict(mock.stats)
+                    return self.send(200, stats)
+                mock.count('requests')
+                mock.delay()
+                if mock.throttled():
+                    mock.count('throttled')
+                    return self.send(429, {'errorMessages': ['Rate limit exceeded.']},
+                                     (('Retry-After', str(mock.retry_after_seconds)),))
+                endpoint, status, body = mock.handle(url.path, parse_qs(url.query), self.headers['Host'])
+                mock.count(endpoint)
+                if status == 303:
+                    return self.send(status, b'', (('Location', body),))
+                self.send(status, body)
+
+        return Handler
+
+    def start(self, host='127.0.0.1', port=0):
+        self.server = MockServer((host, port), self.make_handler())
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://{host}:{self.server.server_address[1]}"
+        return self.base_url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve a synthetic Jira project for benchmarks.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help="0 picks a free port")
+    parser.add_argument('--config', default='{}', help="JSON object of MockJira options, e.g. '{\"issues\": 5000}'")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    mock = MockJira(**json.loads(args.config))
+    print(mock.start(args.host, args.port), flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
+
+if __name__ == "__main__":
+    main()
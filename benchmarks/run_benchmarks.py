@@ -0,0 +1,289 @@
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+EXPORTER_PATH = os.path.join(BENCHMARK_DIR, os.pardir, 'jira-exporter.py')
+MOCK_PATH = os.path.join(BENCHMARK_DIR, 'mock_jira.py')
+
+# Each scenario is a MockJira configuration plus the JiraExporter keyword arguments to run it with.
+# A scenario with `shards` runs `export_sharded` instead and checks that its merged output is
+# byte-identical to a single-process export of the same project.
+SCENARIOS = {
+    'baseline': {
+        'mock': {'issues': 2000, 'latency_ms': 20},
+        'exporter': {}
+    },
+    'high_latency': {
+        'mock': {'issues': 2000, 'latency_ms': 150},
+        'exporter': {}
+    },
+    'throttled': {
+        'mock': {'issues': 2000, 'latency_ms': 20, 'rate_429': 0.02},
+        'exporter': {}
+    },
+    'heavy_issues': {
+        'mock': {'issues': 500, 'latency_ms': 20, 'description_bytes': 50000, 'comments': 150, 'histories': 300},
+        'exporter': {}
+    },
+    'async_backend': {
+        'mock': {'issues': 2000, 'latency_ms': 20},
+        'exporter': {'http_backend': 'async'}
+    },
+    'compact_ndjson_gzip': {
+        'mock': {'issues': 2000, 'latency_ms': 20},
+        'exporter': {'output_format': 'ndjson', 'compression': 'gzip'}
+    },
+    'attachments': {
+        'mock': {'issues': 500, 'latency_ms': 20, 'attachments': 3, 'attachment_bytes': 256 * 1024,
+                 'attachment_redirects': True},
+        'exporter': {'mirror_attachments': True, 'attachment_workers': 8}
+    },
+    'async_attachments': {
+        'mock': {'issues': 500, 'latency_ms': 20, 'attachments': 3, 'attachment_bytes': 256 * 1024,
+                 'attachment_redirects': True},
+        'exporter': {'http_backend': 'async', 'mirror_attachments': True, 'attachment_workers': 8}
+    },
+    'cloud': {
+        'mock': {'issues': 2000, 'latency_ms': 20},
+        'exporter': {},
+        'jira_version': 'cloud'
+    },
+    'sharded': {
+        'mock': {'issues': 2000, 'latency_ms': 20},
+        'exporter': {},
+        'shards': 4
+    }
+}
+
+def load_exporter_module():
+    spec = importlib.util.spec_from_file_location('jira_exporter', EXPORTER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['jira_exporter'] = module
+    spec.loader.exec_module(module)
+    return module
+
+def peak_rss_mb():
+    # Sharded runs export in worker processes; RUSAGE_CHILDREN holds the largest one once they are joined.
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux reports kilobytes, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def combine_profiles(profiles):
+    """Adds up the profiles the shards of a sharded run wrote; hit rates are averaged."""
+    if len(profiles) == 1:
+        return profiles[0]
+    http = {}
+    cache_hit_rates = {}
+    for profile in profiles:
+        for metric, value in profile['http'].items():
+            http[metric] = round(http.get(metric, 0) + value, 3)
+        for cache, rate in profile['cacheHitRates'].items():
+            if rate is not None:
+                cache_hit_rates.setdefault(cache, []).append(rate)
+    return {
+        'issuesWritten': sum(profile['issuesWritten'] for profile in profiles),
+        'bytesWritten': sum(profile['bytesWritten'] for profile in profiles),
+        'http': http,
+        'cacheHitRates': {cache: round(sum(rates) / len(rates), 4) for cache, rates in cache_hit_rates.items()}
+    }
+
+def read_files(paths):
+    contents = {}
+    for path in paths:
+        with open(path, 'rb') as f:
+            contents[path] = f.read()
+    return contents
+
+def indented_layout_matches(batch_files):
+    """Whether every batch file is exactly what `json.dump(batch, indent=4)` would write."""
+    for path in batch_files:
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data != json.dumps(json.loads(data), ensure_ascii=False, indent=4).encode('utf-8'):
+            return False
+    return True
+
+def run_scenario(name, base_url, work_dir, overrides):
+    """Runs one scenario's export against `base_url` in this process and returns its numbers
+    and the result checks that apply to it."""
+    scenario = SCENARIOS[name]
+    exporter_module = load_exporter_module()
+    exporter_module.logging.getLogger().setLevel(exporter_module.logging.WARNING)
+    constants = overrides.get('constants', {})
+    for constant, value in constants.items():
+        setattr(exporter_module.JiraExporter, constant, value)
+    if 'MAX_FILE_SIZE_MB' in constants and 'MAX_FILE_SIZE_BYTES' not in constants:
+        exporter_module.JiraExporter.MAX_FILE_SIZE_BYTES = int(constants['MAX_FILE_SIZE_MB'] * 1024 * 1024)
+    os.chdir(work_dir)
+
+    jira_version = scenario.get('jira_version', 'datacenter')
+    if jira_version == 'cloud':
+        config = {'email': 'bench@example.com', 'token': 'token', 'base_url': base_url, 'auth_type': 'token'}
+    else:
+        config = {'username': 'bench', 'password': 'bench', 'base_url': base_url, 'auth_type': 'basic'}
+    config.update(overrides.get('client', {}))
+    options = dict(scenario['exporter'], profile_path='profile.json', **overrides.get('exporter', {}))
+
+    started = time.perf_counter()
+    if scenario.get('shards'):
+        batch_files = exporter_module.export_sharded(jira_version, 'BENCH', config, config, scenario['shards'],
+                                                     **options)
+    else:
+        batch_files = exporter_module.JiraExporter(jira_version, 'BENCH', config, config, **options).export_issues()
+    elapsed = time.perf_counter() - started
+    # Taken before the result checks, which load the output and run a second export.
+    peak_rss = peak_rss_mb()
+    batch_files = batch_files or []
+    mock_requests = fetch_json(f"{base_url}/__stats")
+
+    profiles = []
+    for path in sorted(glob.glob('profile*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            profiles.append(json.load(f))
+    profile = combine_profiles(profiles)
+
+    checks = {}
+    compact = options.get('compact_output')
+    if compact is None:
+        compact = exporter_module.JiraExporter.COMPACT_OUTPUT
+    if not compact and all(path.endswith('.json') for path in batch_files):
+        checks['indentedLayout'] = indented_layout_matches(batch_files)
+    if options.get('mirror_attachments'):
+        checks['attachmentsMirrored'] = all(profile['attachments']['failedFiles'] == 0 for profile in profiles)
+    if scenario.get('shards'):
+        os.makedirs('single_process')
+        os.chdir('single_process')
+        options.pop('profile_path')
+        reference_files = exporter_module.JiraExporter(jira_version, 'BENCH', config, config,
+                                                       **options).export_issues() or []
+        reference = read_files(reference_files)
+        os.chdir(work_dir)
+        checks['shardedMatchesSingleProcess'] = read_files(batch_files) == reference
+
+    return {
+        'scenario': name,
+        'seconds': round(elapsed, 3),
+        'issues': profile['issuesWritten'],
+        'issuesPerSecond': round(profile['issuesWritten'] / elapsed, 1) if elapsed else 0.0,
+        'peakRssMb': peak_rss,
+        'bytesWritten': profile['bytesWritten'],
+        'batchFiles': len(batch_files),
+        'http': profile['http'],
+        'cacheHitRates': profile['cacheHitRates'],
+        'mockRequests': mock_requests,
+        'checks': checks
+    }
+
+def fetch_json(url):
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+def benchmark(name, issues=None, overrides=None):
+    """Starts a mock server process for scenario `name`, runs the export in a fresh
+    process (so peak RSS is the export's own) and collects both sides' counts."""
+    mock_config = dict(SCENARIOS[name]['mock'])
+    if issues:
+        mock_config['issues'] = issues
+    mock = subprocess.Popen([sys.executable, MOCK_PATH, '--config', json.dumps(mock_config)],
+                            stdout=subprocess.PIPE, text=True)
+    try:
+        base_url = mock.stdout.readline().strip()
+        with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as work_dir:
+            completed = subprocess.run(
+                [sys.executable, __file__, '--run-scenario', name, '--base-url', base_url,
+                 '--work-dir', work_dir, '--overrides', json.dumps(overrides or {})],
+                stdout=subprocess.PIPE, text=True, check=True
+            )
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    finally:
+        mock.terminate()
+        mock.wait()
+
+def print_results(results, baseline=None):
+    baseline = {result['scenario']: result for result in baseline or []}
+    header = (f"{'scenario':<22}{'issues':>8}{'seconds':>10}{'issues/s':>11}{'peak MB':>10}{'requests':>10}"
+              f"{'429s':>7}{'checks':>8}")
+    if baseline:
+        header += f"{'issues/s vs base':>19}{'RSS vs base':>14}"
+    print(header)
+    for result in results:
+        line = (f"{result['scenario']:<22}{result['issues']:>8}{result['seconds']:>10}"
+                f"{result['issuesPerSecond']:>11}{result['peakRssMb']:>10}"
+                f"{result['mockRequests'].get('requests', 0):>10}{result['mockRequests'].get('throttled', 0):>7}"
+                f"{check_status(result):>8}")
+        previous = baseline.get(result['scenario'])
+        if previous:
+            speed = result['issuesPerSecond'] / previous['issuesPerSecond'] - 1 if previous['issuesPerSecond'] else 0
+            memory = result['peakRssMb'] / previous['peakRssMb'] - 1 if previous['peakRssMb'] else 0
+            line += f"{speed:>+19.1%}{memory:>+14.1%}"
+        print(line)
+
+def check_status(result):
+    checks = result.get('checks')
+    if not checks:
+        return '-'
+    return 'ok' if all(checks.values()) else 'FAILED'
+
+def parse_assignment(assignment):
+    name, _, value = assignment.partition('=')
+    try:
+        return name, json.loads(value)
+    except ValueError:
+        return name, value
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run jira-exporter.py end to end against a local mock Jira.")
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO',
+                        help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument('--issues', type=int, help="override the number of issues of every scenario")
+    parser.add_argument('--set', action='append', default=[], type=parse_assignment, metavar='NAME=VALUE',
+                        help="override a JiraExporter constant, e.g. --set MAPPING_WORKERS=30 --set SEARCH_PAGE_SIZE=50")
+    parser.add_argument('--client', action='append', default=[], type=parse_assignment, metavar='NAME=VALUE',
+                        help="add a Jira client option to the config, e.g. --client initial_concurrency=20 "
+                             "--client max_concurrency=100")
+    parser.add_argument('--exporter', action='append', default=[], type=parse_assignment, metavar='NAME=VALUE',
+                        help="pass a JiraExporter keyword argument to every scenario, e.g. --exporter page_workers=8")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--compare', help="results file of an earlier run to compare against")
+    parser.add_argument('--run-scenario', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    parser.add_argument('--work-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--overrides', default='{}', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.run_scenario:
+        print(json.dumps(run_scenario(args.run_scenario, args.base_url, args.work_dir, json.loads(args.overrides))))
+        return
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Unknown scenarios: {', '.join(unknown)}. Available: {', '.join(SCENARIOS)}")
+    overrides = {'constants': dict(args.set), 'client': dict(args.client), 'exporter': dict(args.exporter)}
+    results = [benchmark(name, args.issues, overrides) for name in args.scenarios or SCENARIOS]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(dict(overrides, results=results), f, indent=4)
+    failed = [result['scenario'] for result in results if check_status(result) == 'FAILED']
+    if failed:
+        sys.exit(f"Result checks failed for: {', '.join(failed)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,436 @@
 import requests
 import logging
+import argparse
 import json
+import asyncio
+import bisect
+import gzip
+import hashlib
+import math
 import os
+import re
+import queue
+import random
+import sqlite3
+import tempfile
+import textwrap
 import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+# httpx logs every request at INFO; the per-endpoint counts are in the --profile report instead.
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+def issue_key_order(issue_key):
+    """Sort key that orders `ABC-9` before `ABC-10`, like Jira's `order by key`."""
+    project_key, _, number = issue_key.rpartition('-')
+    return (project_key, int(number)) if number.isdigit() else (issue_key, -1)
+
+def export_order(project_key, issue_key):
+    """Position of an issue in an export of `project_key`: the project's issues by
+    key descending, as the search returns them, then linked issues from other
+    projects by key ascending."""
+    issue_project_key, number = issue_key_order(issue_key)
+    if issue_project_key == project_key:
+        return (0, '', -number)
+    return (1, issue_project_key, number)
+
+def endpoint_label(endpoint):
+    """Groups request paths for metrics, e.g. `/rest/api/2/issue/ABC-1/comment`
+    becomes `/rest/api/2/issue/{key}/comment`."""
+    return re.sub(r'/(issue|project)/[^/?]+', r'/\1/{key}', endpoint.split('?', 1)[0])
+
+class Metrics:
+    """Thread-safe counters and timing histograms for one export run.
+
+    A series is a name plus optional labels, e.g.
+    `http_request_seconds{endpoint="/rest/api/2/search"}`. `report` returns every
+    series as a JSON-friendly dict, with quantiles estimated from the histogram
+    buckets, and `prometheus` renders them in the Prometheus text format.
+    """
+
+    BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+               0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    @staticmethod
+    def series(name, labels):
+        if not labels:
+            return name
+        return name + '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'count': 0, 'sum': 0.0, 'max': 0.0, 'buckets': [0] * (len(self.BUCKETS) + 1)
+                }
+            histogram['count'] += 1
+            histogram['sum'] += seconds
+            histogram['max'] = max(histogram['max'], seconds)
+            histogram['buckets'][bisect.bisect_left(self.BUCKETS, seconds)] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counter_value(self, name, **labels):
+        with self.lock:
+            return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def quantile(self, histogram, q):
+        """Upper bound of the bucket holding the `q` quantile, capped at the largest observation."""
+        rank = q * histogram['count']
+        cumulative = 0
+        for bound, count in zip(self.BUCKETS + (histogram['max'],), histogram['buckets']):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, histogram['max'])
+        return histogram['max']
+
+    def report(self):
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: dict(histogram) for key, histogram in self.histograms.items()}
+        return {
+            "counters": {self.series(*key): value for key, value in sorted(counters.items())},
+            "histograms": {
+                self.series(*key): {
+                    "count": histogram['count'],
+                    "sum": round(histogram['sum'], 6),
+                    "mean": round(histogram['sum'] / histogram['count'], 6),
+                    "p50": round(self.quantile(histogram, 0.5), 6),
+                    "p95": round(self.quantile(histogram, 0.95), 6),
+                    "p99": round(self.quantile(histogram, 0.99), 6),
+                    "max": round(histogram['max'], 6)
+                } for key, histogram in sorted(histograms.items())
+            }
+        }
+
+    def prometheus(self, prefix='jira_export_'):
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, dict(histogram)) for key, histogram in self.histograms.items())
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {prefix}{name} counter")
+                typed.add(name)
+            lines.append(f"{prefix}{self.series(name, labels)} {value}")
+        for (name, labels), histogram in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, count in zip(self.BUCKETS + ('+Inf',), histogram['buckets']):
+                cumulative += count
+                lines.append(f"{prefix}{self.series(name + '_bucket', labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{prefix}{self.series(name + '_sum', labels)} {histogram['sum']}")
+            lines.append(f"{prefix}{self.series(name + '_count', labels)} {histogram['count']}")
+        return '\n'.join(lines) + '\n'
+
+class Serializer:
+    """JSON encoding and decoding through orjson or msgspec when installed, and
+    the stdlib `json` module otherwise.
+
+    `dumps` returns compact UTF-8 bytes. None of the fast libraries can indent
+    by four spaces, so the pretty batch layout is always written by the stdlib.
+    Compact output is not byte-identical across backends: floats can be written
+    differently (the stdlib writes `1e+20` where orjson and msgspec write `1e20`).
+    """
+
+    BACKENDS = ('orjson', 'msgspec', 'json')
+
+    def __init__(self, backend=None):
+        if backend is None:
+            backend = 'orjson' if orjson else 'msgspec' if msgspec else 'json'
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown JSON backend {backend!r}; use one of {', '.join(self.BACKENDS)}.")
+        if (backend == 'orjson' and orjson is None) or (backend == 'msgspec' and msgspec is None):
+            raise RuntimeError(f"The {backend} JSON backend is not installed: pip install {backend}")
+        self.backend = backend
+
+    def loads(self, data):
+        if self.backend == 'orjson':
+            return orjson.loads(data)
+        if self.backend == 'msgspec':
+            return msgspec.json.decode(data)
+        return json.loads(data)
+
+    def dumps(self, value):
+        if self.backend == 'orjson':
+            return orjson.dumps(value)
+        if self.backend == 'msgspec':
+            return msgspec.json.encode(value)
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class RateController:
+    """Client-side throttle shared by every thread that uses one `JiraClient`.
+
+    Concurrency follows AIMD: each successful response raises the limit by
+    roughly one request per round trip, a 429/503 halves it, and a
+    `X-RateLimit-NearLimit` warning trims it by a quarter. `Retry-After` (or
+    `X-RateLimit-Reset` when the quota is exhausted) pauses all callers until
+    the server is ready again. An optional token bucket caps the request rate.
+    """
+
+    THROTTLE_STATUSES = (429, 503)
+    MAX_BACKOFF_SECONDS = 60
+
+    def __init__(self, initial_concurrency=10, min_concurrency=1, max_concurrency=50,
+                 max_requests_per_second=None, backoff_base_seconds=1.0):
+        self.limit = float(initial_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_requests_per_second = max_requests_per_second
+        self.backoff_base_seconds = backoff_base_seconds
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.tokens = float(max_requests_per_second or 0)
+        self.tokens_updated = time.monotonic()
+        self.started = time.monotonic()
+        self.requests = 0
+        self.retries = 0
+        self.throttled_responses = 0
+        self.throttled_seconds = 0.0
+
+    def try_acquire(self):
+        """Takes a request slot if one is available; call with `condition` held.
+
+        Returns 0 when the slot was taken, the seconds to wait while throttled,
+        or None when every slot is in use."""
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.in_flight >= int(self.limit):
+            return None
+        if self.max_requests_per_second:
+            self.tokens = min(self.max_requests_per_second,
+                              self.tokens + (now - self.tokens_updated) * self.max_requests_per_second)
+            self.tokens_updated = now
+            if self.tokens < 1:
+                return (1 - self.tokens) / self.max_requests_per_second
+            self.tokens -= 1
+        self.in_flight += 1
+        self.requests += 1
+        return 0
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                delay = self.try_acquire()
+                if delay == 0:
+                    return
+                if delay is None:
+                    self.condition.wait()
+                    continue
+                started = time.monotonic()
+                self.condition.wait(delay)
+                self.throttled_seconds += time.monotonic() - started
+
+    def release(self, response=None):
+        """Frees the slot taken by `acquire` and adapts to `response`.
+
+        Returns the delay the server asked for, if any."""
+        retry_after = None
+        with self.condition:
+            self.in_flight -= 1
+            if response is not None:
+                retry_after = self.parse_retry_after(response)
+                if response.status_code in self.THROTTLE_STATUSES:
+                    self.throttled_responses += 1
+                    self.limit = max(self.min_concurrency, self.limit / 2)
+                elif response.headers.get('X-RateLimit-NearLimit') == 'true':
+                    self.limit = max(self.min_concurrency, self.limit * 0.75)
+                elif response.status_code < 500:
+                    self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            self.condition.notify_all()
+        return retry_after
+
+    def parse_retry_after(self, response):
+        value = response.headers.get('Retry-After')
+        if value is None and response.headers.get('X-RateLimit-Remaining') == '0':
+            value = response.headers.get('X-RateLimit-Reset')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            reset_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            try:
+                reset_at = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                return None
+        return max(0.0, reset_at.timestamp() - time.time())
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """Delay before retry number `attempt`: exponential backoff with full jitter,
+        never less than what the server asked for."""
+        delay = random.uniform(0, min(self.MAX_BACKOFF_SECONDS, self.backoff_base_seconds * 2 ** attempt))
+        with self.condition:
+            self.retries += 1
+            self.throttled_seconds += max(delay, retry_after or 0)
+        return max(delay, retry_after or 0)
+
+    def backoff(self, attempt, retry_after=None):
+        time.sleep(self.backoff_delay(attempt, retry_after))
+
+    def metrics(self):
+        with self.condition:
+            elapsed = time.monotonic() - self.started
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "throttledResponses": self.throttled_responses,
+                "throttledSeconds": round(self.throttled_seconds, 3),
+                "requestsPerSecond": round(self.requests / elapsed, 2) if elapsed else 0.0,
+                "concurrencyLimit": int(self.limit)
+            }
+
+class AsyncRateController(RateController):
+    """`RateController` for callers running on an asyncio event loop.
+
+    Waiting for a slot or a throttle window suspends the coroutine instead of
+    blocking a thread. Coroutines waiting for a slot queue up in order and
+    `release` wakes only as many as there are free slots, so thousands of
+    pending requests don't all wake up on every response. `acquire` and
+    `release` must be called from the loop.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiters = deque()
+
+    async def acquire(self):
+        while True:
+            with self.condition:
+                delay = self.try_acquire()
+            if delay == 0:
+                return
+            if delay is None:
+                waiter = asyncio.get_running_loop().create_future()
+                self.waiters.append(waiter)
+                await waiter
+                continue
+            started = time.monotonic()
+            await asyncio.sleep(delay)
+            with self.condition:
+                self.throttled_seconds += time.monotonic() - started
+
+    def release(self, response=None):
+        retry_after = super().release(response)
+        with self.condition:
+            free_slots = max(1, int(self.limit) - self.in_flight)
+        while self.waiters and free_slots:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free_slots -= 1
+        return retry_after
+
+    async def backoff(self, attempt, retry_after=None):
+        await asyncio.sleep(self.backoff_delay(attempt, retry_after))
+
+class BandwidthLimiter:
+    """Token bucket in bytes, shared by every attachment download.
+
+    `reserve` takes `size` bytes from the bucket, going into debt when it is
+    empty, and returns how long the caller has to wait before using them, so
+    the combined throughput of all downloads stays at `bytes_per_second`.
+    """
+
+    def __init__(self, bytes_per_second):
+        self.bytes_per_second = float(bytes_per_second)
+        self.tokens = self.bytes_per_second
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, size):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.bytes_per_second,
+                              self.tokens + (now - self.updated) * self.bytes_per_second)
+            self.updated = now
+            self.tokens -= size
+            return max(0.0, -self.tokens / self.bytes_per_second)
 
 class JiraClient:
-    def __init__(self, base_url, auth_type='token', email=None, token=None, username=None, password=None):
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+    def __init__(self, base_url, auth_type='token', email=None, token=None, username=None, password=None,
+                 max_retries=6, initial_concurrency=10, max_concurrency=50, max_requests_per_second=None,
+                 http2=False, timeout=60, serializer=None, metrics=None):
+        if http2:
+            raise ValueError("HTTP/2 needs the async HTTP backend: use http_backend='async' (--http-backend async).")
         self.base_url = base_url
         self.auth_type = auth_type
         self.email = email
         self.token = token
         self.username = username
         self.password = password
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.serializer = serializer or Serializer()
+        self.metrics = metrics or Metrics()
+        self.rate_controller = RateController(initial_concurrency=initial_concurrency,
+                                              max_concurrency=max_concurrency,
+                                              max_requests_per_second=max_requests_per_second)
         self.session = requests.Session()
+        self.session.auth = self.get_auth()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
 
     def get_auth(self):
         if self.auth_type == 'token':
@@ -27,12 +440,40 @@ class JiraClient:
 
     def get(self, endpoint, params=None, headers=None):
         url = f"{self.base_url}{endpoint}"
-        response = self.session.get(url, auth=self.get_auth(),
-                                    headers=headers or {"Accept": "application/json"}, params=params)
-        if response.status_code != 200:
+        label = endpoint_label(endpoint)
+        for attempt in range(self.max_retries + 1):
+            self.rate_controller.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers or {"Accept": "application/json"}, params=params,
+                                            timeout=self.timeout)
+            except self.RETRY_ERRORS as e:
+                self.metrics.increment('http_responses_total', endpoint=label, status='error')
+                self.rate_controller.release()
+                if attempt == self.max_retries:
+                    logging.error(f"Erro ao buscar {endpoint}: {e}")
+                    return None
+                logging.warning(f"Retrying {endpoint} after connection error: {e}")
+                self.rate_controller.backoff(attempt)
+                continue
+            except requests.RequestException as e:
+                self.metrics.increment('http_responses_total', endpoint=label, status='error')
+                self.rate_controller.release()
+                logging.error(f"Erro ao buscar {endpoint}: {e}")
+                return None
+
+            self.metrics.observe('http_request_seconds', time.perf_counter() - started, endpoint=label)
+            self.metrics.increment('http_responses_total', endpoint=label, status=str(response.status_code))
+            retry_after = self.rate_controller.release(response)
+            if response.status_code == 200:
+                with self.metrics.timer('json_decode_seconds'):
+                    return self.serializer.loads(response.content)
+            if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+                logging.warning(f"Retrying {endpoint} after status {response.status_code}.")
+                self.rate_controller.backoff(attempt, retry_after)
+                continue
             logging.error(f"Erro ao buscar {endpoint}: {response.status_code} - {response.text}")
             return None
-        return response.json()
 
     def fetch_issue(self, issue_key, expand=None):
         params = {'expand': expand} if expand else {}
@@ -49,25 +490,1091 @@ class JiraClient:
     def fetch_custom_fields(self):
         return self.get("/rest/api/2/field")
 
-    def search_issues(self, jql, start_at=0, max_results=100, expand=None):
+    def search_issues(self, jql, start_at=0, max_results=100, expand=None, fields=None, validate_query=None):
         params = {
             'jql': jql,
             'startAt': start_at,
             'maxResults': max_results,
-            'expand': expand
+            'expand': expand,
+            'fields': fields,
+            'validateQuery': validate_query
         }
         return self.get("/rest/api/2/search", params=params)
 
     def fetch_project(self, project_key):
         return self.get(f"/rest/api/2/project/{project_key}")
 
+    def fetch_comments(self, issue_key, start_at=0, max_results=100):
+        params = {'startAt': start_at, 'maxResults': max_results}
+        return self.get(f"/rest/api/2/issue/{issue_key}/comment", params=params)
+
+    def fetch_changelog(self, issue_key, start_at=0, max_results=100):
+        """Cloud only: Data Center has no paginated changelog endpoint."""
+        params = {'startAt': start_at, 'maxResults': max_results}
+        return self.get(f"/rest/api/2/issue/{issue_key}/changelog", params=params)
+
+    def download(self, url, sink, chunk_size=64 * 1024, bandwidth=None):
+        """Streams `url` into `sink` in `chunk_size` pieces, paced by the optional
+        `BandwidthLimiter`. `sink.reset()` runs before every attempt, so a retried
+        download starts over. Returns True once the whole body was written."""
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            self.rate_controller.acquire()
+            try:
+                response = self.session.get(url, stream=True, timeout=self.timeout)
+            except self.RETRY_ERRORS as e:
+                self.rate_controller.release()
+                error = e
+            except requests.RequestException as e:
+                self.rate_controller.release()
+                logging.error(f"Erro ao baixar {url}: {e}")
+                return False
+            else:
+                retry_after = self.rate_controller.release(response)
+                with response:
+                    if response.status_code == 200:
+                        try:
+                            sink.reset()
+                            for chunk in response.iter_content(chunk_size):
+                                if bandwidth:
+                                    time.sleep(bandwidth.reserve(len(chunk)))
+                                sink.write(chunk)
+                            return True
+                        except self.RETRY_ERRORS as e:
+                            error = e
+                        except requests.RequestException as e:
+                            logging.error(f"Erro ao baixar {url}: {e}")
+                            return False
+                    elif response.status_code in self.RETRY_STATUSES:
+                        error = f"status {response.status_code}"
+                    else:
+                        logging.error(f"Erro ao baixar {url}: {response.status_code}")
+                        return False
+            if attempt == self.max_retries:
+                logging.error(f"Erro ao baixar {url}: {error}")
+                return False
+            logging.warning(f"Retrying {url} after {error}.")
+            self.rate_controller.backoff(attempt, retry_after)
+
+    def submit(self, method, *args, **kwargs):
+        """Runs `method` (e.g. 'fetch_issue') in the background and returns its Future."""
+        return self.executor.submit(getattr(self, method), *args, **kwargs)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+class AsyncJiraClient:
+    """asyncio counterpart of `JiraClient`, built on httpx.
+
+    All requests share one pooled keep-alive connection set of up to
+    `max_concurrency` connections, optionally over HTTP/2 (needs `h2`), so
+    thousands of requests can be in flight from a single thread.
+    """
+
+    RETRY_STATUSES = JiraClient.RETRY_STATUSES
+
+    def __init__(self, base_url, auth_type='token', email=None, token=None, username=None, password=None,
+                 max_retries=6, initial_concurrency=10, max_concurrency=50, max_requests_per_second=None,
+                 http2=False, timeout=60, serializer=None, metrics=None):
+        if httpx is None:
+            raise RuntimeError("The async HTTP backend requires httpx: pip install httpx")
+        self.base_url = base_url
+        self.auth_type = auth_type
+        self.max_retries = max_retries
+        self.serializer = serializer or Serializer()
+        self.metrics = metrics or Metrics()
+        self.rate_controller = AsyncRateController(initial_concurrency=initial_concurrency,
+                                                   max_concurrency=max_concurrency,
+                                                   max_requests_per_second=max_requests_per_second)
+        self.http = httpx.AsyncClient(
+            base_url=base_url,
+            auth=(email, token) if auth_type == 'token' else (username, password),
+            headers={"Accept": "application/json"},
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            http2=http2,
+            timeout=timeout
+        )
+
+    async def get(self, endpoint, params=None, headers=None):
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        label = endpoint_label(endpoint)
+        for attempt in range(self.max_retries + 1):
+            await self.rate_controller.acquire()
+            started = time.perf_counter()
+            try:
+                response = await self.http.get(endpoint, headers=headers, params=params)
+            except httpx.TransportError as e:
+                self.metrics.increment('http_responses_total', endpoint=label, status='error')
+                self.rate_controller.release()
+                if attempt == self.max_retries:
+                    logging.error(f"Erro ao buscar {endpoint}: {e!r}")
+                    return None
+                logging.warning(f"Retrying {endpoint} after connection error: {e!r}")
+                await self.rate_controller.backoff(attempt)
+                continue
+            except httpx.RequestError as e:
+                self.metrics.increment('http_responses_total', endpoint=label, status='error')
+                self.rate_controller.release()
+                logging.error(f"Erro ao buscar {endpoint}: {e!r}")
+                return None
+
+            self.metrics.observe('http_request_seconds', time.perf_counter() - started, endpoint=label)
+            self.metrics.increment('http_responses_total', endpoint=label, status=str(response.status_code))
+            retry_after = self.rate_controller.release(response)
+            if response.status_code == 200:
+                with self.metrics.timer('json_decode_seconds'):
+                    return self.serializer.loads(response.content)
+            if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+                logging.warning(f"Retrying {endpoint} after status {response.status_code}.")
+                await self.rate_controller.backoff(attempt, retry_after)
+                continue
+            logging.error(f"Erro ao buscar {endpoint}: {response.status_code} - {response.text}")
+            return None
+
+    async def fetch_issue(self, issue_key, expand=None):
+        params = {'expand': expand} if expand else {}
+        return await self.get(f"/rest/api/2/issue/{issue_key}", params=params)
+
+    async def fetch_user(self, user_key, expand=None):
+        params = {'expand': expand} if expand else {}
+
+        if self.auth_type == 'token':  # Jira Cloud
+            return await self.get("/rest/api/3/user/search", params={'query': user_key, **params})
+        else:
+            return await self.get("/rest/api/2/user", params={'username': user_key, **params})
+
+    async def fetch_custom_fields(self):
+        return await self.get("/rest/api/2/field")
+
+    async def search_issues(self, jql, start_at=0, max_results=100, expand=None, fields=None, validate_query=None):
+        params = {
+            'jql': jql,
+            'startAt': start_at,
+            'maxResults': max_results,
+            'expand': expand,
+            'fields': fields,
+            'validateQuery': validate_query
+        }
+        return await self.get("/rest/api/2/search", params=params)
+
+    async def fetch_project(self, project_key):
+        return await self.get(f"/rest/api/2/project/{project_key}")
+
+    async def fetch_comments(self, issue_key, start_at=0, max_results=100):
+        params = {'startAt': start_at, 'maxResults': max_results}
+        return await self.get(f"/rest/api/2/issue/{issue_key}/comment", params=params)
+
+    async def fetch_changelog(self, issue_key, start_at=0, max_results=100):
+        params = {'startAt': start_at, 'maxResults': max_results}
+        return await self.get(f"/rest/api/2/issue/{issue_key}/changelog", params=params)
+
+    async def download(self, url, sink, chunk_size=64 * 1024, bandwidth=None):
+        """`JiraClient.download` on the event loop. Redirects are followed, as Jira Cloud
+        serves attachment content from a media host; httpx drops the credentials when
+        the redirect leaves the Jira origin. The sink's file writes and hashing run in
+        the loop's default executor so they never block other requests."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            released = False
+            await self.rate_controller.acquire()
+            try:
+                async with self.http.stream('GET', url, headers={"Accept": "*/*"}, follow_redirects=True) as response:
+                    retry_after = self.rate_controller.release(response)
+                    released = True
+                    if response.status_code == 200:
+                        await loop.run_in_executor(None, sink.reset)
+                        async for chunk in response.aiter_bytes(chunk_size):
+                            if bandwidth:
+                                await asyncio.sleep(bandwidth.reserve(len(chunk)))
+                            await loop.run_in_executor(None, sink.write, chunk)
+                        return True
+                    if response.status_code not in self.RETRY_STATUSES:
+                        logging.error(f"Erro ao baixar {url}: {response.status_code}")
+                        return False
+                    error = f"status {response.status_code}"
+            except httpx.TransportError as e:
+                if not released:
+                    self.rate_controller.release()
+                error = repr(e)
+            except httpx.RequestError as e:
+                if not released:
+                    self.rate_controller.release()
+                logging.error(f"Erro ao baixar {url}: {e!r}")
+                return False
+            if attempt == self.max_retries:
+                logging.error(f"Erro ao baixar {url}: {error}")
+                return False
+            logging.warning(f"Retrying {url} after {error}.")
+            await self.rate_controller.backoff(attempt, retry_after)
+
+    async def aclose(self):
+        await self.http.aclose()
+
+class AsyncJiraBridge:
+    """Blocking facade with the same surface as `JiraClient` over an `AsyncJiraClient`.
+
+    The client lives on one background event loop thread. The blocking methods
+    wait for their coroutine, while `submit` hands back a Future right away, so
+    many concurrent requests don't need a thread each.
+    """
+
+    def __init__(self, **config):
+        self.base_url = config['base_url']
+        self.auth_type = config.get('auth_type', 'token')
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.async_client = self.run(self.create_client(config))
+        self.rate_controller = self.async_client.rate_controller
+        self.metrics = self.async_client.metrics
+
+    @staticmethod
+    async def create_client(config):
+        return AsyncJiraClient(**config)
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def submit(self, method, *args, **kwargs):
+        return asyncio.run_coroutine_threadsafe(getattr(self.async_client, method)(*args, **kwargs), self.loop)
+
+    def get(self, endpoint, params=None, headers=None):
+        return self.submit('get', endpoint, params=params, headers=headers).result()
+
+    def fetch_issue(self, issue_key, expand=None):
+        return self.submit('fetch_issue', issue_key, expand=expand).result()
+
+    def fetch_user(self, user_key, expand=None):
+        return self.submit('fetch_user', user_key, expand=expand).result()
+
+    def fetch_custom_fields(self):
+        return self.submit('fetch_custom_fields').result()
+
+    def search_issues(self, jql, start_at=0, max_results=100, expand=None, fields=None, validate_query=None):
+        return self.submit('search_issues', jql, start_at=start_at, max_results=max_results,
+                           expand=expand, fields=fields, validate_query=validate_query).result()
+
+    def fetch_project(self, project_key):
+        return self.submit('fetch_project', project_key).result()
+
+    def fetch_comments(self, issue_key, start_at=0, max_results=100):
+        return self.submit('fetch_comments', issue_key, start_at=start_at, max_results=max_results).result()
+
+    def fetch_changelog(self, issue_key, start_at=0, max_results=100):
+        return self.submit('fetch_changelog', issue_key, start_at=start_at, max_results=max_results).result()
+
+    def download(self, url, sink, chunk_size=64 * 1024, bandwidth=None):
+        return self.submit('download', url, sink, chunk_size=chunk_size, bandwidth=bandwidth).result()
+
+    def close(self):
+        self.run(self.async_client.aclose())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+class ProcessedIssueIndex:
+    """In-memory set of processed issue keys.
+
+    Keys are held as integer issue numbers grouped by project key, which is far
+    more compact than the key strings for large projects. Keys that don't follow
+    the `<PROJECT>-<number>` shape are kept as-is.
+    """
+
+    def __init__(self, issue_keys=()):
+        self.numbers = {}
+        self.other_keys = set()
+        self.lock = threading.Lock()
+        for issue_key in issue_keys:
+            self.add(issue_key)
+
+    @staticmethod
+    def split_key(issue_key):
+        project_key, _, number = issue_key.rpartition('-')
+        return project_key, int(number) if project_key and number.isdigit() else None
+
+    def add(self, issue_key):
+        project_key, number = self.split_key(issue_key)
+        with self.lock:
+            if number is None:
+                self.other_keys.add(issue_key)
+            else:
+                self.numbers.setdefault(project_key, set()).add(number)
+
+    def __contains__(self, issue_key):
+        project_key, number = self.split_key(issue_key)
+        if number is None:
+            return issue_key in self.other_keys
+        return number in self.numbers.get(project_key, ())
+
+    def __len__(self):
+        return len(self.other_keys) + sum(len(numbers) for numbers in self.numbers.values())
+
+class CacheStore:
+    """Persistent user, processed-issue, field metadata and attachment caches kept in one SQLite database.
+
+    The database runs in WAL mode so readers never block the writer. Writes are
+    queued and committed (and fsynced) together once `batch_size` of them are
+    pending or `flush_interval_seconds` have passed since the last commit, and on
+    `flush`/`close`. Processed issues are loaded once into a `ProcessedIssueIndex`
+    so resume checks never touch the database. Group memberships older than
+    `group_ttl_seconds` are treated as missing and looked up again.
+    """
+
+    def __init__(self, path, batch_size=500, flush_interval_seconds=5.0, group_ttl_seconds=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.group_ttl_seconds = group_ttl_seconds
+        self.lock = threading.Lock()
+        self.pending_writes = []
+        self.last_commit = time.monotonic()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS user_groups (
+                user_key TEXT PRIMARY KEY,
+                in_group INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS user_accounts (
+                email TEXT PRIMARY KEY,
+                account_id TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS processed_issues (
+                issue_key TEXT PRIMARY KEY,
+                exported_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS field_metadata (
+                base_url TEXT PRIMARY KEY,
+                fields TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS watermarks (
+                project_key TEXT PRIMARY KEY,
+                exported_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS attachments (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL
+            );
+        """)
+        if 'exported_at' not in [row[1] for row in self.conn.execute("PRAGMA table_info(processed_issues)")]:
+            self.conn.execute("ALTER TABLE processed_issues ADD COLUMN exported_at REAL")
+        self.conn.commit()
+        self.processed_issues = ProcessedIssueIndex(
+            row[0] for row in self.conn.execute("SELECT issue_key FROM processed_issues")
+        )
+
+    def is_empty(self):
+        with self.lock:
+            return not any(
+                self.conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+                for table in ('user_groups', 'user_accounts', 'processed_issues')
+            )
+
+    def import_legacy_files(self, user_cache_file, user_accounts_file, processed_issues_file):
+        """Seeds an empty store from the `.txt` caches written by earlier versions."""
+        if not self.is_empty():
+            return
+        for path, save in ((user_cache_file, lambda key, value: self.save_user_group(key, value == 'True')),
+                           (user_accounts_file, self.save_user_account)):
+            if os.path.exists(path):
+                with open(path, 'r') as file:
+                    for line in file:
+                        try:
+                            key, value = line.strip().split(',', 1)
+                        except ValueError:
+                            continue
+                        save(key, value)
+        if os.path.exists(processed_issues_file):
+            with open(processed_issues_file, 'r') as file:
+                for line in file:
+                    if line.strip():
+                        self.mark_issue_processed(line.strip())
+        self.flush()
+
+    def load_user_groups(self):
+        min_fetched_at = time.time() - self.group_ttl_seconds if self.group_ttl_seconds else 0
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT user_key, in_group FROM user_groups WHERE fetched_at >= ?", (min_fetched_at,)
+            ).fetchall()
+        return {user_key: bool(in_group) for user_key, in_group in rows}
+
+    def load_user_accounts(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT email, account_id FROM user_accounts").fetchall()
+        return dict(rows)
+
+    def load_watermark(self, project_key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT exported_at FROM watermarks WHERE project_key = ?", (project_key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_watermark(self, project_key, exported_at):
+        self.queue_write("INSERT OR REPLACE INTO watermarks VALUES (?, ?)", (project_key, exported_at))
+        self.flush()
+
+    def load_field_metadata(self, base_url, max_age_seconds=None):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT fields, fetched_at FROM field_metadata WHERE base_url = ?", (base_url,)
+            ).fetchone()
+        if not row or (max_age_seconds and time.time() - row[1] > max_age_seconds):
+            return None
+        return json.loads(row[0])
+
+    def save_field_metadata(self, base_url, fields):
+        self.queue_write("INSERT OR REPLACE INTO field_metadata VALUES (?, ?, ?)",
+                         (base_url, json.dumps(fields), time.time()))
+        self.flush()
+
+    def load_attachments(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT url, sha256 FROM attachments").fetchall()
+        return dict(rows)
+
+    def save_attachment(self, url, sha256):
+        self.queue_write("INSERT OR REPLACE INTO attachments VALUES (?, ?)", (url, sha256))
+
+    def save_user_group(self, user_key, in_group):
+        self.queue_write("INSERT OR REPLACE INTO user_groups VALUES (?, ?, ?)",
+                         (user_key, int(in_group), time.time()))
+
+    def save_user_account(self, email, account_id):
+        self.queue_write("INSERT OR REPLACE INTO user_accounts VALUES (?, ?)", (email, account_id))
+
+    def is_issue_processed(self, issue_key):
+        return issue_key in self.processed_issues
+
+    def mark_issue_processed(self, issue_key, exported_at=None):
+        self.processed_issues.add(issue_key)
+        self.queue_write("INSERT OR IGNORE INTO processed_issues VALUES (?, ?)", (issue_key, exported_at))
+
+    def resume_watermark(self, project_key, exported_at):
+        """Watermark for a run of `project_key` that skipped issues an earlier run had
+        already processed: the start of the oldest run whose copies were kept, or None
+        when some came from the legacy text cache and their run is unknown."""
+        self.flush()
+        prefix = f"{project_key}-"
+        with self.lock:
+            oldest, unknown = self.conn.execute(
+                "SELECT MIN(exported_at), COUNT(*) - COUNT(exported_at) FROM processed_issues "
+                "WHERE substr(issue_key, 1, ?) = ?", (len(prefix), prefix)
+            ).fetchone()
+        if unknown:
+            return None
+        return min(oldest, exported_at) if oldest is not None else exported_at
+
+    def queue_write(self, statement, params):
+        with self.lock:
+            self.pending_writes.append((statement, params))
+            if (len(self.pending_writes) >= self.batch_size
+                    or time.monotonic() - self.last_commit >= self.flush_interval_seconds):
+                self.commit_pending()
+
+    def commit_pending(self):
+        with self.conn:
+            for statement, params in self.pending_writes:
+                self.conn.execute(statement, params)
+        self.pending_writes = []
+        self.last_commit = time.monotonic()
+
+    def flush(self):
+        with self.lock:
+            self.commit_pending()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+class SharedCache:
+    """Thread-safe memo over a plain dict.
+
+    Concurrent lookups of a missing key wait on the single `loader` call already
+    in flight for it instead of issuing their own. `on_store` is called after a
+    non-None value has been cached, so failed lookups are remembered for the run
+    but never persisted. `load_all` loads many keys through request Futures
+    instead of `loader`, so no thread is held per key. Lookups are counted in
+    `metrics` as hits, misses and waits on another caller's load under the cache
+    `name`.
+    """
+
+    def __init__(self, values, loader, on_store=None, metrics=None, name='cache'):
+        self.values = values
+        self.loader = loader
+        self.on_store = on_store
+        self.metrics = metrics or Metrics()
+        self.name = name
+        self.lock = threading.Lock()
+        self.in_flight = {}
+
+    def get(self, key):
+        with self.lock:
+            if key in self.values:
+                self.metrics.increment('cache_requests_total', cache=self.name, result='hit')
+                return self.values[key]
+            future = self.in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self.in_flight[key] = Future()
+        self.metrics.increment('cache_requests_total', cache=self.name, result='miss' if owner else 'wait')
+        if not owner:
+            return future.result()
+
+        try:
+            value = self.loader(key)
+        except Exception as e:
+            self.fail(key, future, e)
+            raise
+        self.store(key, future, value)
+        return value
+
+    def cached(self, key):
+        """The cached value of `key`, or None, without loading or counting it."""
+        with self.lock:
+            return self.values.get(key)
+
+    def load_all(self, keys, submit, parse, max_in_flight=None):
+        """Loads every key of `keys` that is neither cached nor being loaded.
+
+        `submit(key)` starts a request and returns its Future, and
+        `parse(key, result)` turns the result into the value to cache. At most
+        `max_in_flight` requests are outstanding at once when it is set."""
+        claimed = {}
+        with self.lock:
+            for key in keys:
+                if key not in self.values and key not in self.in_flight and key not in claimed:
+                    claimed[key] = self.in_flight[key] = Future()
+        self.metrics.increment('cache_requests_total', len(claimed), cache=self.name, result='miss')
+        keys_to_load = iter(list(claimed))
+        pending = deque()
+        errors = []
+
+        def submit_next():
+            key = next(keys_to_load, None)
+            if key is None:
+                return
+            try:
+                request = submit(key)
+            except Exception as e:
+                request = Future()
+                request.set_exception(e)
+            pending.append((key, request))
+
+        for _ in range(max_in_flight or len(claimed)):
+            submit_next()
+        while pending:
+            key, request = pending.popleft()
+            try:
+                value = parse(key, request.result())
+            except Exception as e:
+                self.fail(key, claimed[key], e)
+                errors.append(e)
+            else:
+                self.store(key, claimed[key], value)
+            submit_next()
+        if errors:
+            raise errors[0]
+
+    def store(self, key, future, value):
+        with self.lock:
+            self.values[key] = value
+            del self.in_flight[key]
+        if value is not None and self.on_store:
+            self.on_store(key, value)
+        future.set_result(value)
+
+    def fail(self, key, future, error):
+        with self.lock:
+            del self.in_flight[key]
+        future.set_exception(error)
+
+class LinkResolver:
+    """Collects issue link edges while issues are mapped and turns them into the
+    export's `links` section once every issue has an id.
+
+    Edges are recorded by issue key, so mapping never waits on a linked issue.
+    Both ends of a link report it, so links are deduplicated on
+    (source id, destination id, link type) with the lower id as the source.
+    """
+
+    def __init__(self):
+        self.edges = set()
+        self.lock = threading.Lock()
+
+    def add(self, issue_key, linked_issue_key, link_type):
+        with self.lock:
+            self.edges.add((issue_key, linked_issue_key, link_type))
+
+    def linked_keys(self):
+        with self.lock:
+            return {linked_issue_key for _, linked_issue_key, _ in self.edges}
+
+    def save(self, path):
+        """Writes the raw key edges, so a shard's links to issues exported by other
+        shards survive until the merge."""
+        with self.lock:
+            edges = sorted(self.edges)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump([list(edge) for edge in edges], f, ensure_ascii=False)
+
+    def resolve(self, issue_id_map):
+        links = set()
+        with self.lock:
+            edges = list(self.edges)
+        for issue_key, linked_issue_key, link_type in edges:
+            issue_id = issue_id_map.get(issue_key)
+            linked_issue_id = issue_id_map.get(linked_issue_key)
+            if issue_id and linked_issue_id:
+                links.add((min(issue_id, linked_issue_id), max(issue_id, linked_issue_id), link_type))
+        return [
+            {
+                "name": link_type,
+                "sourceId": str(source_id),
+                "destinationId": str(destination_id)
+            } for source_id, destination_id, link_type in sorted(links)
+        ]
+
+class HashingFile:
+    """Binary file wrapper that computes the SHA-256 of the bytes written to it."""
+
+    def __init__(self, file):
+        self.file = file
+        self.reset()
+
+    def reset(self):
+        self.file.seek(0)
+        self.file.truncate()
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk):
+        self.file.write(chunk)
+        self.sha256.update(chunk)
+        self.size += len(chunk)
+
+class AttachmentMirror:
+    """Downloads attachments into a local content-addressed store.
+
+    Each file is streamed to a temporary file while its SHA-256 is computed,
+    then moved to `<store_dir>/<sha[:2]>/<sha>`, so identical files are kept
+    once. Downloaded URLs are remembered in the cache store and skipped on
+    later runs as long as their file is still there. Downloads are submitted to
+    the client, so the async backend runs them without a thread each. At most
+    `max_workers` run at once, and together they stay under `bytes_per_second`
+    when it is set.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, client, cache_store, store_dir, max_workers=4, bytes_per_second=None):
+        self.client = client
+        self.store_dir = store_dir
+        self.temp_dir = os.path.join(store_dir, 'tmp')
+        self.bandwidth = BandwidthLimiter(bytes_per_second) if bytes_per_second else None
+        self.max_workers = max_workers
+        self.downloads = {}
+        self.files = SharedCache(cache_store.load_attachments(), self.download_to_store,
+                                 cache_store.save_attachment, metrics=client.metrics, name='attachments')
+        self.lock = threading.Lock()
+        self.downloaded_files = 0
+        self.downloaded_bytes = 0
+        self.failed_files = 0
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+    def blob_path(self, sha256):
+        return os.path.join(self.store_dir, sha256[:2], sha256)
+
+    def download_to_store(self, url):
+        return self.store_download(url, self.submit_download(url).result())
+
+    def submit_download(self, url):
+        temp_file = tempfile.NamedTemporaryFile(dir=self.temp_dir, delete=False)
+        sink = HashingFile(temp_file)
+        with self.lock:
+            self.downloads[url] = (temp_file, sink, time.perf_counter())
+        return self.client.submit('download', url, sink, self.CHUNK_SIZE, self.bandwidth)
+
+    def store_download(self, url, downloaded):
+        """Moves a finished download into the store and returns its SHA-256, or None
+        when it failed."""
+        with self.lock:
+            temp_file, sink, started = self.downloads.pop(url)
+        temp_file.close()
+        self.client.metrics.observe('attachment_download_seconds', time.perf_counter() - started)
+        if not downloaded:
+            os.remove(temp_file.name)
+            with self.lock:
+                self.failed_files += 1
+            return None
+
+        sha256 = sink.sha256.hexdigest()
+        path = self.blob_path(sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(temp_file.name)
+        else:
+            os.replace(temp_file.name, path)
+        with self.lock:
+            self.downloaded_files += 1
+            self.downloaded_bytes += sink.size
+        return sha256
+
+    def mirror(self, mapped_issues):
+        """Downloads the attachments of `mapped_issues` and points their `uri` at
+        the local copies. Attachments that can't be downloaded keep the remote `uri`."""
+        attachments = [attachment for issue in mapped_issues for attachment in issue['attachments']]
+        urls = list(dict.fromkeys(attachment['uri'] for attachment in attachments))
+        with self.files.lock:
+            for url in urls:
+                sha256 = self.files.values.get(url)
+                if sha256 and not os.path.exists(self.blob_path(sha256)):
+                    del self.files.values[url]
+        self.files.load_all(urls, self.submit_download, self.store_download, self.max_workers)
+        for attachment in attachments:
+            sha256 = self.files.cached(attachment['uri'])
+            if sha256:
+                attachment['uri'] = self.blob_path(sha256)
+
+    def metrics(self):
+        with self.lock:
+            return {
+                "downloadedFiles": self.downloaded_files,
+                "downloadedBytes": self.downloaded_bytes,
+                "failedFiles": self.failed_files
+            }
+
+def open_batch_file(path, mode='rb'):
+    """Opens a batch file in binary `mode`, compressing or decompressing it by its
+    `.gz`/`.zst` extension. Appending to a compressed file adds a new gzip member
+    or zstd frame, and both read back as one continuous stream."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode, compresslevel=BatchWriter.GZIP_LEVEL)
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("zstd batch files require zstandard: pip install zstandard")
+        if 'r' in mode:
+            return zstandard.ZstdDecompressor().stream_reader(open(path, mode), read_across_frames=True)
+        return zstandard.ZstdCompressor(level=BatchWriter.ZSTD_LEVEL).stream_writer(open(path, mode))
+    return open(path, mode)
+
+def is_ndjson_file(path):
+    return re.search(r'\.ndjson(\.gz|\.zst)?$', path) is not None
+
+class BatchWriter:
+    """Streams mapped issues into `jira_export_<KEY>_batch_<n>.json` files.
+
+    Each issue is encoded exactly once and its bytes are appended to the open
+    batch file; a new file is started before an issue would push the current one
+    past `max_file_size_bytes`, leaving room for an empty links section. The
+    links are only complete once every issue has been mapped; `close` appends
+    them to each file when that keeps every file within the limit, and
+    otherwise closes the files with empty links and writes the links into
+    extra batches of their own. With `compact=False` the files are laid out
+    exactly as `json.dump(batch, indent=4)` would write them.
+
+    With `output_format='ndjson'` a `.ndjson` file holds a `{"projects": [...]}`
+    line, one line per issue and a closing `{"links": [...]}` line. `compression`
+    ('gzip' or 'zstd') compresses the files as they are written; the size limit
+    is still measured on the uncompressed bytes the importer will see.
+    """
+
+    COMPRESSION_EXTENSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+    GZIP_LEVEL = 6
+    ZSTD_LEVEL = 3
+
+    def __init__(self, project_key, project_details, max_file_size_bytes, compact=False, file_prefix=None,
+                 output_format='json', compression=None, serializer=None, metrics=None):
+        if compression not in self.COMPRESSION_EXTENSIONS:
+            raise ValueError(f"Unknown compression {compression!r}; use 'gzip' or 'zstd'.")
+        self.project_key = project_key
+        self.file_prefix = file_prefix or f"jira_export_{project_key}"
+        self.project_details = project_details
+        self.max_file_size_bytes = max_file_size_bytes
+        self.compact = compact
+        self.ndjson = output_format == 'ndjson'
+        self.extension = ('.ndjson' if self.ndjson else '.json') + self.COMPRESSION_EXTENSIONS[compression]
+        self.serializer = serializer or Serializer()
+        self.metrics = metrics or Metrics()
+        self.separator = b'\n' if self.ndjson else b',' if compact else b',\n'
+        self.header = self.render_header()
+        self.empty_footer = self.render_footer([])
+        self.current_file = None
+        self.current_size = 0
+        self.current_count = 0
+        self.batch_files = []
+        self.batch_sizes = []
+
+    def batch_file_name(self, index):
+        return f"{self.file_prefix}_batch_{index}{self.extension}"
+
+    def encode(self, data):
+        if self.compact or self.ndjson:
+            return self.serializer.dumps(data)
+        return textwrap.indent(json.dumps(data, ensure_ascii=False, indent=4), ' ' * 8).encode('utf-8')
+
+    def render_header(self):
+        project = self.encode(self.project_details)
+        if self.ndjson:
+            return b'{"projects":[' + project + b']}\n'
+        if self.compact:
+            return b'{"projects":[' + project + b'],"issues":['
+        return b'{\n    "projects": [\n' + project + b'\n    ],\n    "issues": [\n'
+
+    def render_footer(self, links):
+        return self.render_encoded_footer([self.encode(link) for link in links])
+
+    def render_encoded_footer(self, encoded_links):
+        if self.ndjson:
+            return b'\n{"links":[' + b','.join(encoded_links) + b']}\n'
+        if self.compact:
+            return b'],"links":[' + self.separator.join(encoded_links) + b']}'
+        if not encoded_links:
+            return b'\n    ],\n    "links": []\n}'
+        return b'\n    ],\n    "links": [\n' + self.separator.join(encoded_links) + b'\n    ]\n}'
+
+    def render_links_batch(self, encoded_links):
+        """Renders a batch with no issues that holds the given links."""
+        footer = self.render_encoded_footer(encoded_links)
+        if self.ndjson:
+            return self.header + footer[1:]
+        if self.compact:
+            return self.header + footer
+        return self.header[:-1] + footer[len(b'\n    '):]
+
+    def add(self, issue):
+        with self.metrics.timer('encode_seconds'):
+            encoded_issue = self.encode(issue)
+        if self.current_file and (self.current_size + len(self.separator) + len(encoded_issue)
+                                  + len(self.empty_footer) > self.max_file_size_bytes):
+            self.roll_over()
+        written = self.current_size
+        with self.metrics.timer('write_seconds'):
+            if not self.current_file:
+                output_file = self.batch_file_name(len(self.batch_files) + 1)
+                self.current_file = open_batch_file(output_file, 'wb')
+                self.current_file.write(self.header)
+                self.current_size = len(self.header)
+                written = 0
+                self.batch_files.append(output_file)
+            else:
+                self.current_file.write(self.separator)
+                self.current_size += len(self.separator)
+            self.current_file.write(encoded_issue)
+        self.current_size += len(encoded_issue)
+        self.current_count += 1
+        self.metrics.increment('bytes_written_total', self.current_size - written)
+        self.metrics.increment('issues_written_total')
+
+    def roll_over(self):
+        if self.current_file:
+            self.current_file.close()
+            logging.info(f"Batch {self.batch_files[-1]} filled with {self.current_count} issues.")
+            self.batch_sizes.append(self.current_size)
+        self.current_file = None
+        self.current_size = 0
+        self.current_count = 0
+
+    def close(self, links):
+        self.roll_over()
+        with self.metrics.timer('encode_seconds'):
+            encoded_links = [self.encode(link) for link in links]
+            footer = self.render_encoded_footer(encoded_links)
+        issue_files = list(self.batch_files)
+        links_fit = all(size + len(footer) <= self.max_file_size_bytes for size in self.batch_sizes)
+        if not links_fit:
+            logging.warning(f"{len(links)} links do not fit in the issue batches; writing them to separate batches.")
+            footer = self.empty_footer
+        for output_file in issue_files:
+            with self.metrics.timer('write_seconds'), open_batch_file(output_file, 'ab') as f:
+                f.write(footer)
+            self.metrics.increment('bytes_written_total', len(footer))
+            logging.info(f"File {output_file} successfully created.")
+        if not links_fit:
+            self.write_links_batches(encoded_links)
+
+    def write_links_batches(self, encoded_links):
+        """Writes the links into as many issue-less batches as the size limit requires."""
+        link_separator = b',' if self.ndjson else self.separator
+        empty_size = len(self.render_links_batch([b'']))
+        chunk, size = [], empty_size
+        for encoded_link in encoded_links:
+            if chunk and size + len(link_separator) + len(encoded_link) > self.max_file_size_bytes:
+                self.write_links_batch(chunk)
+                chunk, size = [], empty_size
+            size += len(encoded_link) + (len(link_separator) if chunk else 0)
+            chunk.append(encoded_link)
+        if chunk:
+            self.write_links_batch(chunk)
+
+    def write_links_batch(self, encoded_links):
+        output_file = self.batch_file_name(len(self.batch_files) + 1)
+        data = self.render_links_batch(encoded_links)
+        with self.metrics.timer('write_seconds'), open_batch_file(output_file, 'wb') as f:
+            f.write(data)
+        self.batch_files.append(output_file)
+        self.batch_sizes.append(len(data))
+        self.metrics.increment('bytes_written_total', len(data))
+        logging.info(f"File {output_file} successfully created with {len(encoded_links)} links.")
+
+class ExportMerger:
+    """Merges the batch files of several exports of one project by issue key.
+
+    Exports are added oldest first, e.g. a full export followed by its deltas,
+    or the shards of one sharded export in any order. For every key the copy
+    with the latest `updated` wins, with later exports winning ties. A link is
+    kept when the export holding the winning copy of either end still reports
+    it; shards report their links through a `_link_edges.json` file since the
+    other end usually lives in another shard. The winners are written in
+    `export_order` with their stable `externalId`. Input files are read one at
+    a time, so memory is bounded by a few batches plus the index.
+    """
+
+    CACHED_FILES = 4
+
+    def __init__(self, project_key, max_file_size_bytes, compact=False, output_format='json', compression=None,
+                 serializer=None):
+        self.project_key = project_key
+        self.max_file_size_bytes = max_file_size_bytes
+        self.compact = compact
+        self.output_format = output_format
+        self.compression = compression
+        self.serializer = serializer or Serializer()
+        self.input_files = []
+        self.export_of_file = []
+        self.export_count = 0
+        self.winners = {}
+        self.edges = {}
+        self.project_details = None
+        self.loaded_files = OrderedDict()
+
+    def read_batch(self, path):
+        with open_batch_file(path, 'rb') as f:
+            data = f.read()
+        if not is_ndjson_file(path):
+            return self.serializer.loads(data)
+        lines = [line for line in data.splitlines() if line.strip()]
+        return {
+            'projects': self.serializer.loads(lines[0])['projects'],
+            'issues': [self.serializer.loads(line) for line in lines[1:-1]],
+            'links': self.serializer.loads(lines[-1])['links']
+        }
+
+    @staticmethod
+    def updated_at(issue):
+        try:
+            return datetime.strptime(issue.get('updated') or '', '%Y-%m-%dT%H:%M:%S.%f%z').timestamp()
+        except ValueError:
+            return 0.0
+
+    @staticmethod
+    def group_exports(paths):
+        """Groups batch (and link edge) file paths by the export run that wrote them,
+        oldest run first, as `(batch_paths, link_edges_path)` pairs."""
+        exports = {}
+        link_edges = {}
+        for path in paths:
+            if path.endswith(JiraExporter.LINK_EDGES_SUFFIX):
+                link_edges[path[:-len(JiraExporter.LINK_EDGES_SUFFIX)]] = path
+                continue
+            match = re.match(r'(.*)_batch_(\d+)\.(?:nd)?json(?:\.gz|\.zst)?$', path)
+            prefix, index = (match.group(1), int(match.group(2))) if match else (path, 0)
+            exports.setdefault(prefix, []).append((index, path))
+        return [
+            ([path for _, path in sorted(exports[prefix])], link_edges.get(prefix))
+            for prefix in sorted(exports)
+        ]
+
+    def add_export(self, paths, link_edges_path=None):
+        """Indexes the batch files written by one export run."""
+        export_index = self.export_count
+        self.export_count += 1
+        key_of_id = {}
+        raw_links = set()
+        for path in paths:
+            file_index = len(self.input_files)
+            self.input_files.append(path)
+            self.export_of_file.append(export_index)
+            batch = self.read_batch(path)
+            self.project_details = batch['projects'][0] if batch.get('projects') else self.project_details
+            for issue_index, issue in enumerate(batch['issues']):
+                key_of_id[issue['externalId']] = issue['key']
+                updated_at = self.updated_at(issue)
+                current = self.winners.get(issue['key'])
+                if current is None or updated_at >= current[2]:
+                    self.winners[issue['key']] = (file_index, issue_index, updated_at, int(issue['externalId']))
+            raw_links.update((link['sourceId'], link['destinationId'], link['name']) for link in batch['links'])
+        if link_edges_path:
+            with open(link_edges_path, 'r', encoding='utf-8') as f:
+                edges = [tuple(edge) for edge in json.load(f)]
+        else:
+            edges = [
+                (key_of_id[source_id], key_of_id[destination_id], link_type)
+                for source_id, destination_id, link_type in raw_links
+                if source_id in key_of_id and destination_id in key_of_id
+            ]
+        for edge in edges:
+            self.edges.setdefault(edge, set()).add(export_index)
+
+    def export_order(self, issue_key):
+        return export_order(self.project_key, issue_key)
+
+    def load_file(self, file_index):
+        if file_index not in self.loaded_files:
+            self.loaded_files[file_index] = self.read_batch(self.input_files[file_index])['issues']
+            if len(self.loaded_files) > self.CACHED_FILES:
+                self.loaded_files.popitem(last=False)
+        return self.loaded_files[file_index]
+
+    def write(self, file_prefix):
+        issue_keys = sorted(self.winners, key=self.export_order)
+        issue_id_map = {issue_key: winner[3] for issue_key, winner in self.winners.items()}
+        link_resolver = LinkResolver()
+        for (source_key, destination_key, link_type), exports in self.edges.items():
+            if any(self.export_of_file[self.winners[key][0]] in exports
+                   for key in (source_key, destination_key) if key in self.winners):
+                link_resolver.add(source_key, destination_key, link_type)
+
+        writer = BatchWriter(self.project_key, self.project_details, self.max_file_size_bytes,
+                             compact=self.compact, file_prefix=file_prefix, output_format=self.output_format,
+                             compression=self.compression, serializer=self.serializer)
+        for issue_key in issue_keys:
+            file_index, issue_index = self.winners[issue_key][:2]
+            writer.add(self.load_file(file_index)[issue_index])
+        writer.close(link_resolver.resolve(issue_id_map))
+        return writer.batch_files
+
 class JiraExporter:
     MAX_FILE_SIZE_MB = 7
     MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
     CUSTOM_USER = "712020:e5165038-2f2b-4650-a575-e61739ca7376"
+    CACHE_DB_FILE = "export_cache.db"
+    USER_GROUP_TTL_HOURS = 24 * 7
+    FIELD_CACHE_TTL_HOURS = 24
+    DELTA_OVERLAP_MINUTES = 5
+    LINK_EDGES_SUFFIX = "_link_edges.json"
     USER_CACHE_FILE = "users_cache.txt"
     USER_ACCOUNTS_FILE = "users_accounts.txt"
     PROCESSED_ISSUES_CACHE = "processed_issues_cache.txt"
+    SEARCH_PAGE_SIZE = 100
+    SEARCH_FIELDS = "*all"
+    SEARCH_EXPAND = "changelog"
+    SEARCH_PAGE_WORKERS = 4
+    ISSUE_DETAIL_PAGE_SIZE = 100
+    ISSUE_DETAIL_WORKERS = 8
+    LINKED_ISSUES_PER_QUERY = 100
+    MAPPING_WORKERS = 15
+    ATTACHMENT_DIR = "attachments"
+    ATTACHMENT_WORKERS = 4
+    MAX_BUFFERED_ISSUES = 1000
+    COMPACT_OUTPUT = False
+    OUTPUT_FORMAT = 'json'
+    COMPRESSION = None
     EXEMPTED_GROUPS = ["jira-administrators"]
     ALLOWED_CUSTOM_FIELD_TYPES = [
         "com.atlassian.jira.plugin.system.customfieldtypes:textfield",
@@ -93,153 +1600,465 @@ class JiraExporter:
         "com.pyxis.greenhopper.jira:gh-sprint"
     ]
 
-    def __init__(self, jira_version, project_key, config, cloud_config):
+    def __init__(self, jira_version, project_key, config, cloud_config, fetch_mode='search',
+                 page_workers=None, max_buffered_issues=None, compact_output=None, group_ttl_hours=None,
+                 http_backend='sync', http2=False, delta=False, key_range=None, mirror_attachments=False,
+                 attachment_dir=None, attachment_workers=None, attachment_bytes_per_second=None, output_format=None,
+                 compression=None, json_backend=None, profile_path=None, prometheus_path=None):
+        # Options left as None take the class constant's value when the exporter is built,
+        # so constants changed after import still apply. A `group_ttl_hours` of 0 never expires.
+        if group_ttl_hours is None:
+            group_ttl_hours = self.USER_GROUP_TTL_HOURS
         self.jira_version = jira_version
         self.project_key = project_key
+        self.delta = delta
+        self.key_range = key_range
+        self.fetch_mode = fetch_mode
+        self.page_workers = max(1, page_workers or self.SEARCH_PAGE_WORKERS)
+        self.max_buffered_issues = max_buffered_issues or self.MAX_BUFFERED_ISSUES
+        self.compact_output = self.COMPACT_OUTPUT if compact_output is None else compact_output
+        self.output_format = output_format or self.OUTPUT_FORMAT
+        self.compression = compression or self.COMPRESSION
+        self.serializer = Serializer(json_backend)
+        self.metrics = Metrics()
+        self.profile_path = profile_path
+        self.prometheus_path = prometheus_path
         self.config = config
         self.cloud_config = cloud_config
-        self.client = JiraClient(**config)
-        self.cloud_client = self.client if jira_version == 'cloud' else JiraClient(**cloud_config)
-        self.current_issue_id = 1
-        self.link_id_counter = 1
+        self.http_backend = http_backend
+        self.http2 = http2
+        self.client = self.make_client(config)
+        self.cloud_client = self.client if jira_version == 'cloud' else self.make_client(cloud_config)
         self.issue_id_map = {}
-        self.issues_in_progress = set()
-        self.file_lock = threading.Lock()
-        self.user_cache = self.load_user_cache()
-        self.user_accounts = self.load_user_accounts()
-        self.mapped_issues = []
-        self.issue_links = []
-
-    def load_user_cache(self):
-        user_cache = {}
-        if os.path.exists(self.USER_CACHE_FILE):
-            with self.file_lock:
-                with open(self.USER_CACHE_FILE, 'r') as file:
-                    for line in file:
-                        try:
-                            email, in_group = line.strip().split(',', 1)
-                            user_cache[email] = in_group == 'True'
-                        except ValueError:
-                            continue
-        return user_cache
-
-    def load_user_accounts(self):
-        user_accounts = {}
-        if os.path.exists(self.USER_ACCOUNTS_FILE):
-            with self.file_lock:
-                with open(self.USER_ACCOUNTS_FILE, 'r') as file:
-                    for line in file:
-                        try:
-                            email, account_id = line.strip().split(',', 1)
-                            user_accounts[email] = account_id
-                        except ValueError:
-                            continue
-        return user_accounts
+        self.exported_at = None
+        self.claim_lock = threading.Lock()
+        self.cache_store = CacheStore(
+            self.CACHE_DB_FILE, group_ttl_seconds=group_ttl_hours * 3600 if group_ttl_hours else None
+        )
+        self.cache_store.import_legacy_files(
+            self.USER_CACHE_FILE, self.USER_ACCOUNTS_FILE, self.PROCESSED_ISSUES_CACHE
+        )
+        self.user_cache = self.cache_store.load_user_groups()
+        self.user_accounts = self.cache_store.load_user_accounts()
+        self.group_resolver = SharedCache(self.user_cache, self.lookup_user_groups,
+                                          self.cache_store.save_user_group, metrics=self.metrics, name='user_cache')
+        self.account_resolver = SharedCache(self.user_accounts, self.lookup_cloud_account,
+                                            self.cache_store.save_user_account, metrics=self.metrics,
+                                            name='user_accounts')
+        self.custom_fields = None
+        self.custom_fields_lock = threading.Lock()
+        self.link_resolver = LinkResolver()
+        self.detail_executor = ThreadPoolExecutor(max_workers=self.ISSUE_DETAIL_WORKERS)
+        self.watermark = self.cache_store.load_watermark(project_key) if delta else None
+        self.attachment_mirror = None
+        if mirror_attachments:
+            self.attachment_mirror = AttachmentMirror(self.client, self.cache_store,
+                                                      attachment_dir or self.ATTACHMENT_DIR,
+                                                      max_workers=attachment_workers or self.ATTACHMENT_WORKERS,
+                                                      bytes_per_second=attachment_bytes_per_second)
 
-    def save_user_cache(self):
-        with self.file_lock:
-            with open(self.USER_CACHE_FILE, 'w') as file:
-                for email, in_group in self.user_cache.items():
-                    file.write(f"{email},{in_group}\n")
+    def make_client(self, config):
+        if self.http2:
+            config = dict(config, http2=True)
+        if self.http_backend == 'async':
+            return AsyncJiraBridge(serializer=self.serializer, metrics=self.metrics, **config)
+        return JiraClient(serializer=self.serializer, metrics=self.metrics, **config)
 
-    def save_user_accounts(self):
-        with self.file_lock:
-            with open(self.USER_ACCOUNTS_FILE, 'w') as file:
-                for email, account_id in self.user_accounts.items():
-                    file.write(f"{email},{account_id}\n")
+    def close_clients(self):
+        self.detail_executor.shutdown(wait=False)
+        self.client.close()
+        if self.cloud_client is not self.client:
+            self.cloud_client.close()
 
-    def is_user_in_exempted_groups(self, user_key):
-        if user_key in self.user_cache:
-            return self.user_cache[user_key]
+    def lookup_user_groups(self, user_key):
+        return self.parse_user_groups(user_key, self.client.fetch_user(user_key, expand='groups'))
 
-        user_data = self.client.fetch_user(user_key, expand='groups')
+    def parse_user_groups(self, user_key, user_data):
+        if isinstance(user_data, list):
+            user_data = user_data[0] if user_data else None
         if not user_data:
-            self.user_cache[user_key] = False
-            return False
+            return None
 
         groups = user_data.get('groups', {}).get('items', [])
-        in_exempted = any(group['name'] in self.EXEMPTED_GROUPS for group in groups)
-        self.user_cache[user_key] = in_exempted
-        self.save_user_cache()
-        return in_exempted
+        return any(group['name'] in self.EXEMPTED_GROUPS for group in groups)
+
+    def lookup_cloud_account(self, email):
+        return self.parse_cloud_account(email, self.cloud_client.fetch_user(email))
+
+    def parse_cloud_account(self, email, account_data):
+        if account_data and isinstance(account_data, list):
+            return account_data[0].get('accountId', self.CUSTOM_USER)
+        return None
+
+    def is_user_in_exempted_groups(self, user_key):
+        return bool(self.group_resolver.get(user_key))
+
+    def user_key(self, user_data):
+        return user_data.get('accountId') if self.jira_version == 'cloud' else user_data.get('name')
 
     def handle_user(self, user_data):
         if not user_data:
             return self.CUSTOM_USER
 
-        user_key = user_data.get('accountId') if self.jira_version == 'cloud' else user_data.get('name')
+        user_key = self.user_key(user_data)
         email = user_data.get('emailAddress')
 
-        if self.is_user_in_exempted_groups(user_key):
+        if user_key and self.is_user_in_exempted_groups(user_key):
             if self.jira_version == 'datacenter' and email:
-                account_id = self.user_accounts.get(email)
-                if not account_id:
-                    account_data = self.cloud_client.fetch_user(email)
-                    if account_data and isinstance(account_data, list) and account_data:
-                        account_id = account_data[0].get('accountId', self.CUSTOM_USER)
-                        self.user_accounts[email] = account_id
-                        self.save_user_accounts()
-                    else:
-                        account_id = self.CUSTOM_USER
-                return account_id
+                return self.account_resolver.get(email) or self.CUSTOM_USER
             return user_key
         return self.CUSTOM_USER
 
+    def collect_users(self, issue, custom_fields):
+        fields = issue['fields']
+        users = [fields.get('reporter'), fields.get('assignee')]
+        users += [a.get('author') for a in fields.get('attachment', [])]
+        users += [c.get('author') for c in (fields.get('comment') or {}).get('comments', [])]
+        users += [h.get('author') for h in (issue.get('changelog') or {}).get('histories', [])]
+        for field_id, field_info in custom_fields.items():
+            value = fields.get(field_id)
+            if field_info['type'] == 'com.atlassian.jira.plugin.system.customfieldtypes:userpicker':
+                users.append(value if isinstance(value, dict) else None)
+            elif field_info['type'] == 'com.atlassian.jira.plugin.system.customfieldtypes:multiuserpicker':
+                users += [user for user in value or [] if isinstance(user, dict)]
+        return [user for user in users if user]
+
+    def prefetch_users(self, issues, custom_fields):
+        """Resolves every distinct user referenced by `issues` before they are mapped,
+        so the mapping workers only ever hit the cache. The lookups are submitted to
+        the client together, so the async backend runs them without a thread each;
+        Data Center users in an exempted group then get their Cloud account looked up."""
+        distinct_users = {}
+        for issue in issues:
+            for user in self.collect_users(issue, custom_fields):
+                distinct_users.setdefault((user.get('accountId'), user.get('name'), user.get('emailAddress')), user)
+        users = [user for user in distinct_users.values() if self.user_key(user)]
+        self.group_resolver.load_all(
+            [self.user_key(user) for user in users],
+            lambda user_key: self.client.submit('fetch_user', user_key, expand='groups'),
+            self.parse_user_groups
+        )
+        if self.jira_version == 'datacenter':
+            self.account_resolver.load_all(
+                [user['emailAddress'] for user in users
+                 if user.get('emailAddress') and self.group_resolver.cached(self.user_key(user))],
+                lambda email: self.cloud_client.submit('fetch_user', email),
+                self.parse_cloud_account
+            )
+
     def fetch_custom_fields(self):
-        fields = self.client.fetch_custom_fields()
-        if not fields:
-            return {}
+        """Returns the allowed custom fields, loading them once per run.
+
+        The raw `/field` response is cached in the store per instance URL for
+        `FIELD_CACHE_TTL_HOURS`. Each entry carries the extractor for its field
+        type, so mapping never has to re-inspect the type list.
+        """
+        with self.custom_fields_lock:
+            if self.custom_fields is None:
+                self.custom_fields = self.load_custom_fields()
+            return self.custom_fields
+
+    def load_custom_fields(self):
+        base_url = self.client.base_url
+        fields = self.cache_store.load_field_metadata(base_url, self.FIELD_CACHE_TTL_HOURS * 3600)
+        if fields is None:
+            fields = self.client.fetch_custom_fields()
+            if not fields:
+                return {}
+            self.cache_store.save_field_metadata(base_url, fields)
         custom_fields = {
-            field['id']: {"name": field['name'], "type": field['schema']['custom']}
+            field['id']: {
+                "name": field['name'],
+                "type": field['schema']['custom'],
+                "extract": self.field_extractor(field['schema']['custom'])
+            }
             for field in fields
             if field.get('schema') and field['schema'].get('custom') in self.ALLOWED_CUSTOM_FIELD_TYPES
         }
         logging.info(f"{len(custom_fields)} allowed custom field types found.")
         return custom_fields
 
-    def fetch_issues(self):
-        issues = []
-        start_at = 0
-        max_results = 100
-        total = None
+    def submit_search_page(self, jql, start_at, max_results):
+        search_mode = self.fetch_mode == 'search'
+        return self.client.submit(
+            'search_issues',
+            jql=jql,
+            start_at=start_at,
+            max_results=max_results,
+            expand=self.SEARCH_EXPAND if search_mode else None,
+            fields=self.SEARCH_FIELDS if search_mode else None,
+            validate_query='warn'
+        )
+
+    def iter_search_pages(self, jql):
+        """Yields the search pages for `jql` in order.
+
+        The first page is fetched on its own to learn `total` and the page size the
+        server actually honoured; the remaining offsets are then requested with up
+        to `page_workers` pages in flight and handed out in offset order. Pages that
+        still fail after retries are counted in `search_pages_missing_total`.
+        """
+        first_page = self.submit_search_page(jql, 0, self.SEARCH_PAGE_SIZE).result()
+        if first_page is None:
+            logging.error(f"First search page missing for {jql}.")
+            self.metrics.increment('search_pages_missing_total')
+            return
+        if not first_page.get('issues'):
+            return
+        yield first_page
+
+        total = first_page.get('total', 0)
+        page_size = first_page.get('maxResults') or len(first_page['issues'])
+        offsets = iter(range(page_size, total, page_size))
+
+        pending = deque()
+
+        def submit_next_page():
+            start_at = next(offsets, None)
+            if start_at is not None:
+                pending.append(self.submit_search_page(jql, start_at, page_size))
+
+        for _ in range(self.page_workers):
+            submit_next_page()
+        while pending:
+            page = pending.popleft().result()
+            submit_next_page()
+            if not page:
+                logging.error(f"Search page missing for {jql}; later pages may be incomplete.")
+                self.metrics.increment('search_pages_missing_total')
+                continue
+            yield page
+
+    def project_jql(self):
+        """JQL for the project's issues: restricted to `key_range` for a shard, and in
+        delta mode to those updated since the last export, minus
+        `DELTA_OVERLAP_MINUTES` to absorb clock skew.
+
+        The relative `-<n>m` form keeps the query independent of the time zone
+        Jira would otherwise apply to an absolute date."""
+        jql = f'project={self.project_key}'
+        if self.key_range:
+            low, high = self.key_range
+            jql += f' AND issuekey >= {self.project_key}-{low} AND issuekey <= {self.project_key}-{high}'
+        if self.watermark:
+            minutes = math.ceil((time.time() - self.watermark) / 60) + self.DELTA_OVERLAP_MINUTES
+            jql += f' AND updated >= -{minutes}m'
+        return jql + ' order by key desc'
+
+    def iter_issue_pages(self, jql=None):
+        """Yields every search page of `jql` (by default `project_jql`) as a list of
+        full issue payloads.
+
+        In 'search' mode every page is requested with the full field set and the
+        changelog expanded, so issues are taken straight from the search payload
+        and only the comments or changelog that came back truncated are fetched
+        again (see `complete_issues`). The 'issue' mode keeps the old
+        one-request-per-key path.
+        """
+        search_mode = self.fetch_mode == 'search'
+
+        for page in self.iter_search_pages(jql or self.project_jql()):
+            if jql is None and page.get('startAt', 0) == 0:
+                logging.info(f"Total issues to export: {page.get('total', 0)}")
+            issues = page.get('issues', [])
+            if search_mode:
+                self.complete_issues(issues)
+                yield issues
+                continue
+            futures = [self.client.submit('fetch_issue', issue_summary['key']) for issue_summary in issues]
+            fetched_issues = [issue for issue in (future.result() for future in futures) if issue]
+            self.metrics.increment('issues_missing_total', len(issues) - len(fetched_issues))
+            yield fetched_issues
+
+    def fetch_issue_pages(self, method, issue_key, items_key):
+        """Collects every item of a paginated issue resource (`fetch_comments` or
+        `fetch_changelog`). The first page gives the total and the page size the
+        server allows; the remaining pages are then requested at once.
+
+        Returns None when a page can't be fetched."""
+        first_page = getattr(self.client, method)(issue_key, max_results=self.ISSUE_DETAIL_PAGE_SIZE)
+        if not first_page:
+            return None
+        items = list(first_page.get(items_key, []))
+        page_size = first_page.get('maxResults') or len(items)
+        if not page_size:
+            return items
+        futures = [
+            self.client.submit(method, issue_key, start_at=start_at, max_results=page_size)
+            for start_at in range(page_size, first_page.get('total', 0), page_size)
+        ]
+        for future in futures:
+            page = future.result()
+            if not page:
+                return None
+            items += page.get(items_key, [])
+        return items
+
+    def fetch_all_comments(self, issue_key):
+        return self.fetch_issue_pages('fetch_comments', issue_key, 'comments')
+
+    def fetch_all_histories(self, issue_key):
+        if self.jira_version == 'datacenter':
+            issue = self.client.fetch_issue(issue_key, expand='changelog')
+            return (issue.get('changelog') or {}).get('histories') if issue else None
+        return self.fetch_issue_pages('fetch_changelog', issue_key, 'values')
+
+    def complete_issues(self, issues):
+        """Replaces the truncated comments and changelogs of search results with the
+        full lists from the paginated endpoints, fetched concurrently for the whole
+        page. Data Center has no `/changelog` endpoint, so a truncated changelog is
+        read from the expanded issue there instead. If a fetch fails, the embedded
+        part is kept."""
+        pending = []
+        for issue in issues:
+            if self.is_comment_truncated(issue):
+                pending.append((issue, 'comment', self.detail_executor.submit(self.fetch_all_comments, issue['key'])))
+            if self.is_changelog_truncated(issue):
+                pending.append((issue, 'changelog', self.detail_executor.submit(self.fetch_all_histories, issue['key'])))
+
+        for issue, part, future in pending:
+            items = future.result()
+            if items is None:
+                logging.error(f"Unable to fetch the full {part} of {issue['key']}; exporting the embedded part only.")
+            elif part == 'comment':
+                issue['fields']['comment'] = {'comments': items, 'total': len(items), 'maxResults': len(items), 'startAt': 0}
+            else:
+                issue['changelog'] = {'histories': items, 'total': len(items), 'maxResults': len(items), 'startAt': 0}
+
+    def iter_buffered_pages(self):
+        """Runs `iter_issue_pages` on a producer thread and yields its pages.
+
+        Fetched but not yet mapped issues are capped at roughly `max_buffered_issues`,
+        counting both the queued pages and the ones still in flight. When the queue
+        is full the producer blocks, so a slow mapper or writer stops fetching
+        instead of buffering.
+        """
+        buffered_pages = self.max_buffered_issues // self.SEARCH_PAGE_SIZE - self.page_workers
+        page_queue = queue.Queue(maxsize=max(1, buffered_pages))
+        stop_event = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stop_event.is_set():
+                try:
+                    page_queue.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for page in self.iter_issue_pages():
+                    if not put(page):
+                        return
+            except Exception as e:
+                put(e)
+            put(done)
 
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            while True:
+                with self.metrics.timer('page_wait_seconds'):
+                    item = page_queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop_event.set()
+
+    def map_page(self, issues, custom_fields, executor):
+        with self.metrics.timer('prefetch_users_seconds'):
+            self.prefetch_users(issues, custom_fields)
+
+        def map_issue(issue):
+            with self.metrics.timer('map_issue_seconds'):
+                return self.map_issue_details(issue, custom_fields)
+
+        mapped_page = executor.map(map_issue, issues)
+        return [mapped_issue for mapped_issue in mapped_page if mapped_issue]
+
+    def mirror_attachments(self, mapped_issues):
+        if self.attachment_mirror:
+            self.attachment_mirror.mirror(mapped_issues)
+        return mapped_issues
+
+    def map_linked_issues(self, custom_fields, executor):
+        """Maps the linked issues the project search didn't cover, in rounds,
+        yielding one mapped page at a time.
+
+        Each round fetches every still-unknown linked key with batched
+        `key in (...)` searches; the issues it maps may link further, which the
+        next round picks up. Keys the server can't return are tried only once.
+        Delta exports and shards leave the project's own issues to the export
+        or shard they will be merged with.
+        """
+        attempted_keys = set()
         while True:
-            data = self.client.search_issues(
-                jql=f'project={self.project_key} order by key desc',
-                start_at=start_at,
-                max_results=max_results
-            )
-            if not data:
-                break
+            missing_keys = sorted(self.link_resolver.linked_keys() - set(self.issue_id_map) - attempted_keys,
+                                  key=issue_key_order)
+            if self.watermark or self.key_range:
+                missing_keys = [key for key in missing_keys if issue_key_order(key)[0] != self.project_key]
+            if not missing_keys:
+                return
+            attempted_keys.update(missing_keys)
+            logging.info(f"Fetching {len(missing_keys)} linked issues outside the exported pages.")
+            for start in range(0, len(missing_keys), self.LINKED_ISSUES_PER_QUERY):
+                keys = ', '.join(missing_keys[start:start + self.LINKED_ISSUES_PER_QUERY])
+                for page in self.iter_issue_pages(f'key in ({keys}) order by key asc'):
+                    yield self.map_page(page, custom_fields, executor)
+
+    def write_linked_issues(self, writer, custom_fields, executor):
+        """Writes the linked issues in `export_order` without holding them in memory.
 
-            issues_batch = data.get('issues', [])
-            total = total or data.get('total', 0)
+        Each mapped page has its attachments mirrored and is spooled to a temporary
+        file; only the order key, offset and length of every issue are kept until
+        the spool is read back in order."""
+        index = []
+        with tempfile.TemporaryFile() as spool:
+            for mapped_page in self.map_linked_issues(custom_fields, executor):
+                for mapped_issue in self.mirror_attachments(mapped_page):
+                    encoded_issue = self.serializer.dumps(mapped_issue)
+                    index.append((export_order(self.project_key, mapped_issue['key']), spool.tell(), len(encoded_issue)))
+                    spool.write(encoded_issue)
+            index.sort()
+            for _, offset, length in index:
+                spool.seek(offset)
+                writer.add(self.serializer.loads(spool.read(length)))
 
-            for issue_summary in issues_batch:
-                issue_key = issue_summary['key']
-                full_issue_data = self.client.fetch_issue(issue_key)  
-                if full_issue_data:
-                    issues.append(full_issue_data)
+    def is_comment_truncated(self, issue):
+        comment = issue['fields'].get('comment') or {}
+        return comment.get('total', 0) > len(comment.get('comments', []))
 
-            start_at += max_results
+    def is_changelog_truncated(self, issue):
+        changelog = issue.get('changelog') or {}
+        return changelog.get('total', 0) > len(changelog.get('histories', []))
 
-            if len(issues) >= total:
-                break
+    def allocate_issue_id(self, issue):
+        """The externalId of an issue is Jira's own numeric issue id.
 
-        logging.info(f"Total de issues buscadas: {len(issues)} de {total}.")
-        return issues
+        It needs no shared counter, is unique across projects, and stays the same
+        whichever thread, process or run maps the issue, so resumed, delta and
+        sharded exports all agree and re-runs with the same JSON backend are
+        byte-identical."""
+        return int(issue['id'])
 
     def map_issue_details(self, issue, custom_fields):
         issue_key = issue['key']
-        if issue_key in self.issues_in_progress or self.is_issue_processed(issue_key):
-            logging.info(f"Issue {issue_key} already processed or in progress. Skipping.")
+        issue_id = self.allocate_issue_id(issue)
+        with self.claim_lock:
+            already_mapped = issue_key in self.issue_id_map
+            self.issue_id_map[issue_key] = issue_id
+        processed_earlier = not already_mapped and not self.watermark and self.is_issue_processed(issue_key)
+        if processed_earlier and issue_key_order(issue_key)[0] == self.project_key:
+            self.metrics.increment('issues_skipped_processed_total')
+        if already_mapped or processed_earlier:
+            logging.debug(f"Issue {issue_key} already processed or in progress. Skipping.")
             return
 
-        self.issues_in_progress.add(issue_key)
-        issue_id = self.current_issue_id
-        self.current_issue_id += 1
-        self.issue_id_map[issue_key] = issue_id
-
         mapped_issue = {
             "key": issue_key,
             "externalId": str(issue_id),
@@ -267,7 +2086,7 @@ class JiraExporter:
 
         self.process_custom_fields(issue, custom_fields, mapped_issue)
 
-        self.process_issue_links(issue, issue_id)
+        self.process_issue_links(issue)
 
         attachments = issue['fields'].get('attachment', [])
         mapped_issue["attachments"] = [
@@ -308,44 +2127,47 @@ class JiraExporter:
         ]
 
         self.mark_issue_as_processed(issue_key)
-        self.issues_in_progress.remove(issue_key)
-        self.mapped_issues.append(mapped_issue)
-        logging.info(f"Issue {issue_key} mapeada com sucesso.")
+        logging.debug(f"Issue {issue_key} mapeada com sucesso.")
+        return mapped_issue
 
     def process_custom_fields(self, issue, custom_fields, mapped_issue):
-        for field_id, field_value in issue['fields'].items():
-            if field_id.startswith("customfield_") and field_id in custom_fields and field_value:
-                custom_field_info = custom_fields[field_id]
-                value = self.extract_custom_field_value(field_value, custom_field_info['type'])
+        fields = issue['fields']
+        for field_id, custom_field_info in custom_fields.items():
+            field_value = fields.get(field_id)
+            if field_value:
                 mapped_issue['customFieldValues'].append({
                     "fieldName": custom_field_info['name'],
-                    "fieldType": custom_field_info.get('type', 'unknown'),
-                    "value": value
+                    "fieldType": custom_field_info['type'],
+                    "value": custom_field_info['extract'](field_value)
                 })
 
-    def extract_custom_field_value(self, field_value, field_type):
+    def extract_option_value(self, field_value):
         if isinstance(field_value, dict) and 'value' in field_value:
-            value = field_value['value']
+            return field_value['value']
         elif isinstance(field_value, list):
-            value = [item['value'] if isinstance(item, dict) and 'value' in item else item for item in field_value]
-        else:
-            value = field_value
-
-        if field_type == 'com.atlassian.jira.plugin.system.customfieldtypes:datetime':
-            value = self.format_jira_datetime(value)
-
-        if field_type in ['com.atlassian.jira.plugin.system.customfieldtypes:userpicker',
-                          'com.atlassian.jira.plugin.system.customfieldtypes:multiuserpicker']:
-            if field_type == 'com.atlassian.jira.plugin.system.customfieldtypes:userpicker':
-                if isinstance(value, dict):
-                    value = self.handle_user(value)
-                else:
-                    value = self.handle_user({'emailAddress': value})
-            elif field_type == 'com.atlassian.jira.plugin.system.customfieldtypes:multiuserpicker':
-                value = [self.handle_user(user) for user in field_value if isinstance(user, dict)]
-        return value
+            return [item['value'] if isinstance(item, dict) and 'value' in item else item for item in field_value]
+        return field_value
+
+    def extract_datetime_value(self, field_value):
+        return self.format_jira_datetime(self.extract_option_value(field_value))
+
+    def extract_user_value(self, field_value):
+        value = self.extract_option_value(field_value)
+        if isinstance(value, dict):
+            return self.handle_user(value)
+        return self.handle_user({'emailAddress': value})
+
+    def extract_multi_user_value(self, field_value):
+        return [self.handle_user(user) for user in field_value if isinstance(user, dict)]
+
+    def field_extractor(self, field_type):
+        return {
+            'com.atlassian.jira.plugin.system.customfieldtypes:datetime': self.extract_datetime_value,
+            'com.atlassian.jira.plugin.system.customfieldtypes:userpicker': self.extract_user_value,
+            'com.atlassian.jira.plugin.system.customfieldtypes:multiuserpicker': self.extract_multi_user_value,
+        }.get(field_type, self.extract_option_value)
 
-    def process_issue_links(self, issue, issue_id):
+    def process_issue_links(self, issue):
         issue_links = issue['fields'].get('issuelinks', [])
         for link in issue_links:
             link_type = link['type']['name']
@@ -355,32 +2177,13 @@ class JiraExporter:
                 linked_issue_key = link['outwardIssue']['key']
             else:
                 continue
-
-            if linked_issue_key not in self.issue_id_map:
-                linked_issue = self.client.fetch_issue(linked_issue_key)
-                if linked_issue:
-                    self.map_issue_details(linked_issue, self.fetch_custom_fields())
-
-            linked_issue_id = self.issue_id_map.get(linked_issue_key)
-            if linked_issue_id:
-                source_id, destination_id = (issue_id, linked_issue_id) if issue_id < linked_issue_id else (linked_issue_id, issue_id)
-                if not any(l['sourceId'] == str(source_id) and l['destinationId'] == str(destination_id) for l in self.issue_links):
-                    self.issue_links.append({
-                        "name": link_type,
-                        "sourceId": str(source_id),
-                        "destinationId": str(destination_id)
-                    })
+            self.link_resolver.add(issue['key'], linked_issue_key, link_type)
 
     def is_issue_processed(self, issue_key):
-        if os.path.exists(self.PROCESSED_ISSUES_CACHE):
-            with open(self.PROCESSED_ISSUES_CACHE, 'r') as file:
-                return issue_key in file.read().splitlines()
-        return False
+        return self.cache_store.is_issue_processed(issue_key)
 
     def mark_issue_as_processed(self, issue_key):
-        with self.file_lock:
-            with open(self.PROCESSED_ISSUES_CACHE, 'a') as file:
-                file.write(f"{issue_key}\n")
+        self.cache_store.mark_issue_processed(issue_key, self.exported_at)
 
     def format_jira_datetime(self, value):
         try:
@@ -390,63 +2193,176 @@ class JiraExporter:
             logging.error(f"Error formatting date: {e}")
             return value
 
-    def calculate_size_in_bytes(self, data):
-        return len(json.dumps(data).encode('utf-8'))
-
-    def split_issues_into_batches(self, project_details):
-        batches = []
-        current_batch = []
-        current_size = 0
-
-        for issue in self.mapped_issues:
-            issue_size = self.calculate_size_in_bytes(issue)
-            if current_size + issue_size > self.MAX_FILE_SIZE_BYTES:
-                batches.append({
-                    "projects": [project_details],
-                    "issues": current_batch,
-                    "links": self.issue_links
-                })
-                current_batch = []
-                current_size = 0
-            current_batch.append(issue)
-            current_size += issue_size
-
-        if current_batch:
-            batches.append({
-                "projects": [project_details],
-                "issues": current_batch,
-                "links": self.issue_links
-            })
-        return batches
+    def plan_shards(self, shard_count):
+        """Splits the project's key numbers into `shard_count` disjoint inclusive
+        ranges, highest first, so the shards together follow the search order."""
+        data = self.client.search_issues(f'project={self.project_key} order by key desc',
+                                         max_results=1, fields='key')
+        if not data or not data.get('issues'):
+            return []
+        highest = issue_key_order(data['issues'][0]['key'])[1]
+        shard_size = math.ceil(highest / shard_count)
+        return [
+            (low, min(low + shard_size - 1, highest))
+            for low in reversed(range(1, highest + 1, shard_size))
+        ]
 
     def export_issues(self):
-        project_details = self.client.fetch_project(self.project_key)
-        if not project_details:
-            logging.error(f"Unable to fetch project details for {self.project_key}. Exiting...")
-            return
+        try:
+            project_details = self.client.fetch_project(self.project_key)
+            if not project_details:
+                logging.error(f"Unable to fetch project details for {self.project_key}. Exiting...")
+                return
 
-        custom_fields = self.fetch_custom_fields()
-        issues = self.fetch_issues()
-        if not issues:
-            logging.info("No issues found.")
-            return
+            exported_at = self.exported_at = time.time()
+            started = time.perf_counter()
+            custom_fields = self.fetch_custom_fields()
+            file_prefix = None
+            if self.key_range:
+                file_prefix = f"jira_export_{self.project_key}_keys_{self.key_range[0]}_{self.key_range[1]}"
+            elif self.watermark:
+                delta_stamp = datetime.fromtimestamp(exported_at, timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+                file_prefix = f"jira_export_{self.project_key}_delta_{delta_stamp}"
+                logging.info(f"Delta export of {self.project_key} since "
+                             f"{datetime.fromtimestamp(self.watermark, timezone.utc).isoformat()}.")
+            writer = BatchWriter(self.project_key, project_details, self.MAX_FILE_SIZE_BYTES,
+                                 compact=self.compact_output, file_prefix=file_prefix, output_format=self.output_format,
+                                 compression=self.compression, serializer=self.serializer, metrics=self.metrics)
 
-        logging.info(f"Total issues to export: {len(issues)}")
+            try:
+                with ThreadPoolExecutor(max_workers=self.MAPPING_WORKERS) as executor:
+                    with self.metrics.timer('stage_seconds', stage='project_issues'):
+                        for page in self.iter_buffered_pages():
+                            for mapped_issue in self.mirror_attachments(self.map_page(page, custom_fields, executor)):
+                                writer.add(mapped_issue)
+                    with self.metrics.timer('stage_seconds', stage='linked_issues'):
+                        self.write_linked_issues(writer, custom_fields, executor)
+            finally:
+                self.cache_store.flush()
+                self.close_clients()
 
-        with ThreadPoolExecutor(max_workers=15) as executor:
-            futures = [
-                executor.submit(self.map_issue_details, issue, custom_fields)
-                for issue in issues
-            ]
-            for future in as_completed(futures):
-                future.result()
-
-        batches = self.split_issues_into_batches(project_details)
-        for idx, batch in enumerate(batches, start=1):
-            output_file = f"jira_export_{self.project_key}_batch_{idx}.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(batch, f, ensure_ascii=False, indent=4)
-            logging.info(f"File {output_file} successfully created.")
+            with self.metrics.timer('stage_seconds', stage='links'):
+                writer.close(self.link_resolver.resolve(self.issue_id_map))
+            missing_pages = self.metrics.counter_value('search_pages_missing_total')
+            missing_issues = self.metrics.counter_value('issues_missing_total')
+            if missing_pages or missing_issues:
+                logging.error(f"The export is incomplete: {missing_pages} search pages and {missing_issues} issues "
+                              f"could not be fetched.")
+            if self.key_range:
+                self.link_resolver.save(writer.file_prefix + self.LINK_EDGES_SUFFIX)
+            elif missing_pages or missing_issues:
+                logging.error(f"Watermark of {self.project_key} not saved; the next delta export starts from the "
+                              f"previous one.")
+            else:
+                self.save_watermark(exported_at)
+            if not writer.batch_files:
+                logging.info("No issues found.")
+            logging.info(f"HTTP metrics: {json.dumps(self.client.rate_controller.metrics())}")
+            if self.attachment_mirror:
+                logging.info(f"Attachment metrics: {json.dumps(self.attachment_mirror.metrics())}")
+            self.write_profile(time.perf_counter() - started)
+            return writer.batch_files
+        finally:
+            self.cache_store.close()
+
+    def save_watermark(self, exported_at):
+        """Saves the project's watermark. A run that kept issues processed by earlier runs
+        only exported what changed since then, so the mark goes back to when the oldest
+        of those runs started."""
+        skipped = self.metrics.counter_value('issues_skipped_processed_total')
+        watermark = exported_at
+        if skipped:
+            watermark = self.cache_store.resume_watermark(self.project_key, exported_at)
+            if watermark is None:
+                logging.warning(f"Watermark of {self.project_key} not saved: {skipped} issues were kept from "
+                                f"earlier runs of unknown date.")
+                return
+            logging.info(f"{skipped} issues were kept from earlier runs; watermark of {self.project_key} set to "
+                         f"{datetime.fromtimestamp(watermark, timezone.utc).isoformat()}.")
+        self.cache_store.save_watermark(self.project_key, watermark)
+
+    def cache_hit_rate(self, name):
+        lookups = {result: self.metrics.counter_value('cache_requests_total', cache=name, result=result)
+                   for result in ('hit', 'miss', 'wait')}
+        total = sum(lookups.values())
+        return round(lookups['hit'] / total, 4) if total else None
+
+    def profile_report(self, elapsed_seconds):
+        issues_written = self.metrics.counter_value('issues_written_total')
+        report = {
+            "project": self.project_key,
+            "elapsedSeconds": round(elapsed_seconds, 3),
+            "issuesWritten": issues_written,
+            "issuesPerSecond": round(issues_written / elapsed_seconds, 2) if elapsed_seconds else 0.0,
+            "bytesWritten": self.metrics.counter_value('bytes_written_total'),
+            "cacheHitRates": {name: self.cache_hit_rate(name) for name in ('user_cache', 'user_accounts')},
+            "http": self.client.rate_controller.metrics()
+        }
+        if self.attachment_mirror:
+            report["attachments"] = self.attachment_mirror.metrics()
+        report.update(self.metrics.report())
+        return report
+
+    def write_profile(self, elapsed_seconds):
+        """Writes the run's metrics as JSON to `profile_path` and in the Prometheus
+        text format to `prometheus_path`, when set."""
+        if self.profile_path:
+            with open(self.profile_path, 'w', encoding='utf-8') as f:
+                json.dump(self.profile_report(elapsed_seconds), f, ensure_ascii=False, indent=4)
+            logging.info(f"Profile written to {self.profile_path}.")
+        if self.prometheus_path:
+            with open(self.prometheus_path, 'w', encoding='utf-8') as f:
+                f.write(self.metrics.prometheus())
+            logging.info(f"Prometheus metrics written to {self.prometheus_path}.")
+
+def make_merger(project_key, options):
+    """ExportMerger writing the same kind of batch files as a `JiraExporter` built with `options`."""
+    compact = options.get('compact_output')
+    return ExportMerger(project_key, JiraExporter.MAX_FILE_SIZE_BYTES,
+                        compact=JiraExporter.COMPACT_OUTPUT if compact is None else compact,
+                        output_format=options.get('output_format') or JiraExporter.OUTPUT_FORMAT,
+                        compression=options.get('compression') or JiraExporter.COMPRESSION,
+                        serializer=Serializer(options.get('json_backend')))
+
+def export_shard(jira_version, project_key, config, cloud_config, key_range, **options):
+    for option in ('profile_path', 'prometheus_path'):
+        if options.get(option):
+            root, extension = os.path.splitext(options[option])
+            options[option] = f"{root}_keys_{key_range[0]}_{key_range[1]}{extension}"
+    exporter = JiraExporter(jira_version, project_key, config, cloud_config, key_range=key_range, **options)
+    batch_files = exporter.export_issues() or []
+    return batch_files + [f"jira_export_{project_key}_keys_{key_range[0]}_{key_range[1]}"
+                          f"{JiraExporter.LINK_EDGES_SUFFIX}"]
+
+def export_sharded(jira_version, project_key, config, cloud_config, shard_count, processes=None, **options):
+    """Exports the project as `shard_count` key-range shards in separate processes,
+    then merges them into `jira_export_<KEY>_batch_<n>.json` files.
+
+    `options` are passed on to each shard's `JiraExporter`; the attachment
+    bandwidth is split evenly between the shards."""
+    planner_options = {name: options[name] for name in ('http_backend', 'http2', 'json_backend') if name in options}
+    planner = JiraExporter(jira_version, project_key, config, cloud_config, **planner_options)
+    key_ranges = planner.plan_shards(shard_count)
+    planner.close_clients()
+    planner.cache_store.close()
+    if not key_ranges:
+        logging.info("No issues found.")
+        return []
+    logging.info(f"Exporting {project_key} in {len(key_ranges)} shards: {key_ranges}")
+    if options.get('attachment_bytes_per_second'):
+        options['attachment_bytes_per_second'] /= len(key_ranges)
+
+    with ProcessPoolExecutor(max_workers=processes or len(key_ranges)) as executor:
+        futures = [
+            executor.submit(export_shard, jira_version, project_key, config, cloud_config, key_range, **options)
+            for key_range in key_ranges
+        ]
+        shard_files = [path for future in futures for path in future.result() if os.path.exists(path)]
+
+    merger = make_merger(project_key, options)
+    for paths, link_edges_path in ExportMerger.group_exports(shard_files):
+        merger.add_export(paths, link_edges_path)
+    return merger.write(f"jira_export_{project_key}")
 
 def select_jira_version():
     print("Please select the Jira version you are using:")
@@ -461,9 +2377,67 @@ def select_jira_version():
         else:
             print("Invalid input. Choose 1 for Jira Cloud or 2 for Jira Data Center.")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export the issues of a Jira project to JSON batch files.")
+    parser.add_argument('--jira-version', choices=['cloud', 'datacenter'],
+                        help="skip the interactive Jira version prompt")
+    parser.add_argument('--project', help="skip the interactive project key prompt")
+    parser.add_argument('--delta', action='store_true',
+                        help="only export issues updated since the project's last export")
+    parser.add_argument('--merge', nargs='+', metavar='BATCH_FILE',
+                        help="merge the batch (and link edge) files of earlier full, delta or shard exports "
+                             "by issue key")
+    parser.add_argument('--shards', type=int,
+                        help="export in this many key-range shards in parallel processes, then merge them")
+    parser.add_argument('--key-range', nargs=2, type=int, metavar=('LOW', 'HIGH'),
+                        help="export only issue numbers LOW..HIGH as one shard, e.g. on another machine")
+    parser.add_argument('--mirror-attachments', metavar='DIR', nargs='?', const=JiraExporter.ATTACHMENT_DIR,
+                        help="download attachments into DIR (default: %(const)s) and point their uri at the local copy")
+    parser.add_argument('--attachment-workers', type=int,
+                        help=f"maximum number of concurrent attachment downloads "
+                             f"(default: {JiraExporter.ATTACHMENT_WORKERS})")
+    parser.add_argument('--attachment-bandwidth', type=float, metavar='MB_PER_SECOND',
+                        help="cap the combined attachment download rate")
+    parser.add_argument('--compact', action='store_true', default=None, help="write batch files without indentation")
+    parser.add_argument('--format', choices=['json', 'ndjson'],
+                        help=f"batch file format: one JSON document, or one JSON line per issue "
+                             f"(default: {JiraExporter.OUTPUT_FORMAT})")
+    parser.add_argument('--compress', choices=['gzip', 'zstd'],
+                        help="compress the batch files; the size limit still applies to the uncompressed data")
+    parser.add_argument('--http-backend', choices=['sync', 'async'], default='sync',
+                        help="send requests from a thread pool with requests (sync) or from one asyncio event loop "
+                             "with httpx (async)")
+    parser.add_argument('--http2', action='store_true', help="use HTTP/2 (needs --http-backend async and h2)")
+    parser.add_argument('--json-backend', choices=Serializer.BACKENDS,
+                        help="JSON library to use (default: orjson or msgspec when installed, else json)")
+    parser.add_argument('--profile', metavar='PATH', nargs='?', const='export_profile.json',
+                        help="write per-stage timings, HTTP latencies and cache hit rates as JSON "
+                             "(default: %(const)s)")
+    parser.add_argument('--prometheus', metavar='PATH', help="also write the metrics in the Prometheus text format")
+    args = parser.parse_args()
+    if args.http2 and args.http_backend != 'async':
+        parser.error("--http2 requires --http-backend async")
+    return args
+
 def main():
-    JIRA_VERSION = select_jira_version()
-    PROJECT_KEY = input("Enter the project key you want to export: ")
+    args = parse_args()
+    output_options = {
+        'compact_output': args.compact,
+        'output_format': args.format,
+        'compression': args.compress,
+        'json_backend': args.json_backend
+    }
+    if args.merge:
+        PROJECT_KEY = args.project or input("Enter the project key of the exports to merge: ")
+        merger = make_merger(PROJECT_KEY, output_options)
+        for paths, link_edges_path in ExportMerger.group_exports(args.merge):
+            merger.add_export(paths, link_edges_path)
+        for output_file in merger.write(f"jira_export_{PROJECT_KEY}_merged"):
+            logging.info(f"Merged export written to {output_file}.")
+        return
+
+    JIRA_VERSION = args.jira_version or select_jira_version()
+    PROJECT_KEY = args.project or input("Enter the project key you want to export: ")
 
     # Declarar a configuração do Jira Cloud apenas uma vez
     cloud_config = {
@@ -483,7 +2457,22 @@ def main():
             'auth_type': 'basic'
         }
 
-    exporter = JiraExporter(JIRA_VERSION, PROJECT_KEY, config, cloud_config)
+    options = dict(output_options, http_backend=args.http_backend, http2=args.http2,
+                   profile_path=args.profile, prometheus_path=args.prometheus)
+    if args.mirror_attachments:
+        options.update({
+            'mirror_attachments': True,
+            'attachment_dir': args.mirror_attachments,
+            'attachment_workers': args.attachment_workers,
+            'attachment_bytes_per_second': args.attachment_bandwidth * 1024 * 1024 if args.attachment_bandwidth else None
+        })
+
+    if args.shards:
+        export_sharded(JIRA_VERSION, PROJECT_KEY, config, cloud_config, args.shards, **options)
+        return
+
+    exporter = JiraExporter(JIRA_VERSION, PROJECT_KEY, config, cloud_config, delta=args.delta,
+                            key_range=tuple(args.key_range) if args.key_range else None, **options)
     exporter.export_issues()
 
 if __name__ == "__main__":